@@ -0,0 +1,91 @@
+"""
+Benchmark: CCTV relay fan-out against a local fake camera.
+
+    python benchmarks/bench_cctv.py --viewers 1 50 500 --seconds 5 [--thumbnails]
+
+For each upstream mode (MJPEG stream, JPEG snapshots) and viewer count it
+starts a CameraStub and one CameraRelay. Simulated viewers then poll latest()
+at the dashboard's thumbnail rate. Reported per run:
+
+  upstream   GET requests the camera received (1 for MJPEG, however many viewers)
+  kept/s     frames the relay kept (throttled to --fps)
+  copies     distinct bytes objects seen per frame across all viewers (1 = shared)
+  p95 us     latency of latest()
+
+and the run fails if an MJPEG relay opened more than one upstream connection,
+or if any relayed frame differs from one the camera sent (--thumbnails sends
+frames with an embedded JPEG thumbnail, which marker scanning would cut short).
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO))
+from stubs import CameraStub, camera_frames  # noqa: E402
+
+
+def run(mode, viewers, seconds, fps, view_interval, threads=8, thumbnails=False):
+    from cctv import CameraRelay
+
+    with CameraStub(mode=mode, fps=25, frames=camera_frames(thumbnail=thumbnails)) as stub:
+        sent = set(stub.frames)
+        relay = CameraRelay(stub.url, mode="auto", max_fps=fps, interval=1 / fps)
+        seen = {}          # seq -> set of id(data)
+        intact = [True]
+        latencies = []
+        lock = threading.Lock()
+        deadline = time.monotonic() + seconds
+
+        def viewer_group(count):
+            local, ids = [], {}
+            while time.monotonic() < deadline:
+                for _ in range(count):
+                    t0 = time.perf_counter()
+                    frame = relay.latest()
+                    local.append(time.perf_counter() - t0)
+                    if frame is not None:
+                        ids.setdefault(frame.seq, set()).add(id(frame.data))
+                        intact[0] &= frame.data in sent
+                time.sleep(view_interval)
+            with lock:
+                latencies.extend(local)
+                for seq, objs in ids.items():
+                    seen.setdefault(seq, set()).update(objs)
+
+        workers = [threading.Thread(target=viewer_group, args=(max(viewers // threads, 1),))
+                   for _ in range(min(threads, viewers))]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        copies = max((len(v) for v in seen.values()), default=0)
+        p95 = statistics.quantiles(latencies, n=20)[-1] * 1e6 if len(latencies) > 1 else 0.0
+        return stub.requests, len(seen) / seconds, copies, p95, intact[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--viewers", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--fps", type=float, default=2.0, help="relay frame-rate cap")
+    parser.add_argument("--view-interval", type=float, default=0.5, help="seconds between viewer polls")
+    parser.add_argument("--thumbnails", action="store_true", help="frames carry an embedded JPEG thumbnail")
+    args = parser.parse_args(argv)
+
+    print(f"{'mode':>9} {'viewers':>8} {'upstream':>9} {'kept/s':>7} {'copies':>7} {'p95 us':>8} {'intact':>7}")
+    failed = False
+    for mode in ("mjpeg", "snapshot"):
+        for viewers in args.viewers:
+            upstream, rate, copies, p95, intact = run(mode, viewers, args.seconds, args.fps, args.view_interval,
+                                                      thumbnails=args.thumbnails)
+            print(f"{mode:>9} {viewers:>8} {upstream:>9} {rate:7.2f} {copies:>7} {p95:8.1f} {str(intact):>7}")
+            failed |= (mode == "mjpeg" and upstream != 1) or not intact
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
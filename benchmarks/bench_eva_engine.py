@@ -0,0 +1,98 @@
+"""
+Benchmark: vectorized eva_engine vs a row-by-row reference implementation.
+
+    python benchmarks/bench_eva_engine.py --rows 1000 10000 100000
+
+For each size it builds a seeded synthetic EVA export, checks that both
+implementations agree, and prints median wall time per call. Agreement is
+also checked on the same export as 0-100 percentages, including one where no
+activity is past 1.5%, so a scale guessed from the data would show up.
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import eva_engine  # noqa: E402
+from generate import synthetic_eva  # noqa: E402
+
+
+def reference_eva(raw, status_date, pct_scale=1.0):
+    """Straightforward per-row loop, the way a spreadsheet formula would do it."""
+    status = pd.Timestamp(status_date)
+    rows = sorted(raw.to_dict("records"), key=lambda r: r["Planned Date"])
+    out = []
+    cum = {"Cum Planned": 0.0, "Cum BCWS": 0.0, "Cum BCWP": 0.0, "Cum ACWP": 0.0}
+    for r in rows:
+        bac = float(r["Planned Cost"])
+        pct = min(max(float(r["Actual Percentage"]) / pct_scale, 0.0), 1.0)
+        bcws = bac if r["Planned Date"] <= status else 0.0
+        bcwp = bac * pct
+        acwp = float(r["Actual Cost"])
+        spi = bcwp / bcws if bcws else np.nan
+        cpi = bcwp / acwp if acwp else np.nan
+        eac = bac / cpi if cpi and cpi > 0 else np.nan
+        cum["Cum Planned"] += bac
+        cum["Cum BCWS"] += bcws
+        cum["Cum BCWP"] += bcwp
+        cum["Cum ACWP"] += acwp
+        out.append({
+            "BAC": bac, "BCWS": bcws, "BCWP": bcwp, "ACWP": acwp,
+            "SV": bcwp - bcws, "CV": bcwp - acwp, "SPI": spi, "CPI": cpi,
+            "EAC": eac, "ETC": eac - acwp, "VAC": bac - eac,
+            "TCPI": (bac - bcwp) / (bac - acwp) if bac != acwp else np.nan,
+            **cum,
+        })
+    return pd.DataFrame(out)
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - t0)
+    return result, statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--reference-max-rows", type=int, default=100000,
+                        help="skip the slow reference above this size")
+    args = parser.parse_args(argv)
+
+    status = pd.Timestamp("2026-01-01")
+    columns = ["BAC", "BCWS", "BCWP", "ACWP"] + eva_engine.INDEX_COLUMNS + \
+              ["Cum Planned", "Cum BCWS", "Cum BCWP", "Cum ACWP"]
+    print(f"{'rows':>8} {'engine ms':>10} {'rollups ms':>11} {'reference ms':>13} {'speedup':>8}")
+    for rows in args.rows:
+        raw = synthetic_eva(rows)
+        eva, t_engine = timed(lambda: eva_engine.compute_eva(raw, status), args.repeat)
+        _, t_rollup = timed(lambda: (eva_engine.rollup_wbs(eva, 2),
+                                     eva_engine.rollup_period(eva, "M", status),
+                                     eva_engine.summarize(eva)), args.repeat)
+        if rows <= args.reference_max_rows:
+            ref, t_ref = timed(lambda: reference_eva(raw, status), 1)
+            pd.testing.assert_frame_equal(eva[columns].reset_index(drop=True), ref[columns],
+                                          check_exact=False, rtol=1e-9)
+            pct = raw["Actual Percentage"]
+            for scaled in (pct * 100, pct * 1.5):   # 0-100 exports, the second with no activity past 1.5%
+                as_percent = raw.assign(**{"Actual Percentage": scaled})
+                pd.testing.assert_frame_equal(
+                    eva_engine.compute_eva(as_percent, status, percent_scale=100)[columns].reset_index(drop=True),
+                    reference_eva(as_percent, status, pct_scale=100.0)[columns], check_exact=False, rtol=1e-9)
+            ref_ms, speedup = f"{t_ref * 1e3:13.1f}", f"{t_ref / t_engine:7.0f}x"
+        else:
+            ref_ms, speedup = f"{'skipped':>13}", f"{'-':>8}"
+        print(f"{rows:>8} {t_engine * 1e3:10.1f} {t_rollup * 1e3:11.1f} {ref_ms} {speedup}")
+
+
+if __name__ == "__main__":
+    main()
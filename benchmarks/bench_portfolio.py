@@ -0,0 +1,77 @@
+"""
+Benchmark: portfolio load across many sites.
+
+    python benchmarks/bench_portfolio.py --sites 25 100 --rows 500
+
+For each site count it lays out a seeded multi-site portfolio (reused on later
+runs) and times sites.portfolio() four ways:
+
+  serial ms    cold caches, one worker thread (the pre-pool behaviour)
+  pool ms      cold caches, the process pool
+  warm ms      nothing changed since the last call
+  restatus ms  a different status date (frames cached, summaries recomputed)
+
+and checks that the serial and pooled results agree.
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+REPO = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO))
+from generate import write_portfolio  # noqa: E402
+
+
+def cold(sites, frame_cache):
+    frame_cache.invalidate()
+    sites._summaries.clear()
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - t0) * 1e3
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sites", type=int, nargs="+", default=[25, 100])
+    parser.add_argument("--rows", type=int, default=500, help="activities per site workbook")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", default=str(REPO / "bench_results" / "portfolios"))
+    args = parser.parse_args(argv)
+
+    import sites
+    from frame_cache import frame_cache
+
+    status = datetime.date(2026, 1, 1)
+    print(f"workers: {sites.WORKERS}")
+    print(f"{'sites':>6} {'serial ms':>10} {'pool ms':>9} {'warm ms':>8} {'restatus ms':>12}")
+    cwd = os.getcwd()
+    for n_sites in args.sites:
+        root = write_portfolio(Path(args.work_dir) / f"p{n_sites}_{args.rows}", n_sites, args.rows, args.seed)
+        os.chdir(root)
+        try:
+            manifest = sites.load_manifest()
+            site_list = list(manifest.sites.values())
+            cold(sites, frame_cache)
+            with ThreadPoolExecutor(1) as one:
+                (serial, _), t_serial = timed(lambda: sites.portfolio(site_list, status, pool=one))
+            cold(sites, frame_cache)
+            (pooled, _), t_pool = timed(lambda: sites.portfolio(site_list, status))
+            pd.testing.assert_frame_equal(serial, pooled)
+            _, t_warm = timed(lambda: sites.portfolio(site_list, status))
+            _, t_restatus = timed(lambda: sites.portfolio(site_list, status + datetime.timedelta(days=30)))
+        finally:
+            os.chdir(cwd)
+        print(f"{n_sites:>6} {t_serial:10.1f} {t_pool:9.1f} {t_warm:8.1f} {t_restatus:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
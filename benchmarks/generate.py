@@ -0,0 +1,176 @@
+"""
+Seeded synthetic site data for benchmarks.
+
+    python benchmarks/generate.py OUT_DIR --rows 10000
+
+writes the layout dashboard.py reads, with the exact column names it expects:
+
+  data/EVA_Analysis.xlsx        Activities, WBS, Planned/Actual Date,
+                                Planned/Actual Cost, Actual Percentage and the
+                                legacy precomputed Cummulative/SPI/CPI/SV/CV columns
+  data/Milestone.xlsx           Activities, WBS, Planned Date, Actual Date
+  data/progress_<ddmon>.xlsx    Element ID, Type, Status, Quantity, % Complete
+  data/elements.sqlite          precast element store (see element_store.py)
+  visuals/                      logo, site photo, progress GIFs and photos
+
+write_portfolio() instead lays out many sites plus a sites.json manifest.
+
+The same seed and row count always give identical workbooks.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from element_store import ElementStore  # noqa: E402
+
+SNAPSHOT_DATES = ["06feb", "08mar", "17mar"]
+ELEMENT_TYPES = ["Wall", "Beam", "Slab", "Column", "Stair", "Lintel"]
+ELEMENT_STATUSES = ["Manufactured", "QA Pending", "QA Passed", "Dispatched", "Installed on Site"]
+
+# Smallest valid images: 1x1 PNG and 1x1 GIF
+PNG_1X1 = bytes.fromhex(
+    "89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c489"
+    "0000000d49444154789c6360606060000000050001a5f645400000000049454e44ae426082"
+)
+GIF_1X1 = bytes.fromhex(
+    "474946383761010001008000000000000000002c000000000100010000080400010404003b"
+)
+
+
+def synthetic_eva(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2025-01-01")
+    planned = start + pd.to_timedelta(rng.integers(0, 720, rows), unit="D")
+    done = rng.random(rows) < 0.6
+    actual = planned + pd.to_timedelta(rng.integers(-10, 40, rows), unit="D")
+    planned_cost = rng.uniform(1e3, 5e5, rows).round(2)
+    return pd.DataFrame({
+        "Activities": [f"Activity {i}" for i in range(rows)],
+        "WBS": [f"{a}.{b}.{c}" for a, b, c in rng.integers(1, 10, (rows, 3))],
+        "Planned Date": planned,
+        "Actual Date": pd.Series(actual).where(done),
+        "Planned Cost": planned_cost,
+        "Actual Cost": (planned_cost * rng.uniform(0.7, 1.4, rows) * done).round(2),
+        "Actual Percentage": np.where(done, 1.0, rng.uniform(0, 0.9, rows)).round(3),
+    })
+
+
+def with_legacy_columns(eva):
+    """Add the precomputed columns older EVA workbooks carry."""
+    eva = eva.sort_values("Planned Date", ignore_index=True)
+    bcwp = eva["Planned Cost"] * eva["Actual Percentage"]
+    acwp = eva["Actual Cost"]
+    return eva.assign(**{
+        "Cummulative Planned Cost": eva["Planned Cost"].cumsum(),
+        "Cummulative Actual Cost": acwp.cumsum(),
+        "SPI = BCWP / BCWS": eva["Actual Percentage"],
+        "CPI = BCWP / ACWP": (bcwp / acwp.where(acwp > 0)).round(3),
+        "SV = BCWP - BCWS": bcwp - eva["Planned Cost"],
+        "CV = BCWP - ACWP": bcwp - acwp,
+    })
+
+
+def synthetic_milestones(rows, seed=0):
+    eva = synthetic_eva(rows, seed + 1)
+    return eva[["Activities", "WBS", "Planned Date", "Actual Date"]]
+
+
+def synthetic_progress(rows, seed=0, snapshots=SNAPSHOT_DATES):
+    """One frame per snapshot: elements get added and move forward between dates."""
+    rng = np.random.default_rng(seed + 2)
+    ids = np.array([f"PC-{i:06d}" for i in range(rows)])
+    types = rng.choice(ELEMENT_TYPES, rows)
+    quantity = rng.integers(1, 20, rows)
+    percent = np.zeros(rows)
+    frames = {}
+    for i, date in enumerate(snapshots):
+        visible = int(rows * (i + 1) / len(snapshots))
+        percent = np.minimum(percent + rng.uniform(0, 50, rows), 100).round(1)
+        quantity = quantity + (rng.random(rows) < 0.05)
+        status = np.array(ELEMENT_STATUSES)[np.minimum((percent / 25).astype(int), len(ELEMENT_STATUSES) - 1)]
+        frames[date] = pd.DataFrame({
+            "Element ID": ids[:visible],
+            "Type": types[:visible],
+            "Status": status[:visible],
+            "Quantity": quantity[:visible],
+            "% Complete": percent[:visible],
+        })
+    return frames
+
+
+def synthetic_elements(rows, seed=0):
+    rng = np.random.default_rng(seed + 3)
+    return pd.DataFrame({
+        "Element ID": [f"PC-{i:06d}" for i in range(rows)],
+        "Type": rng.choice(ELEMENT_TYPES, rows),
+        "Status": rng.choice(ELEMENT_STATUSES, rows),
+        "Last Updated": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 200 * 86400, rows), unit="s"),
+    })
+
+
+def _write_once(path, data):
+    if not path.exists():
+        path.write_bytes(data)
+
+
+def write_site(root, rows, seed=0):
+    """Write a full synthetic site under root (skips files that already exist)."""
+    root = Path(root)
+    data, visuals = root / "data", root / "visuals"
+    data.mkdir(parents=True, exist_ok=True)
+    visuals.mkdir(parents=True, exist_ok=True)
+
+    eva_path = data / "EVA_Analysis.xlsx"
+    if not eva_path.exists():
+        with_legacy_columns(synthetic_eva(rows, seed)).to_excel(eva_path, index=False)
+    ms_path = data / "Milestone.xlsx"
+    if not ms_path.exists():
+        synthetic_milestones(rows, seed).to_excel(ms_path, index=False)
+    elements_path = data / "elements.sqlite"
+    if not elements_path.exists():
+        ElementStore(elements_path).upsert(synthetic_elements(rows, seed))
+    for date, frame in synthetic_progress(rows, seed).items():
+        path = data / f"progress_{date}.xlsx"
+        if not path.exists():
+            frame.to_excel(path, index=False)
+        _write_once(visuals / f"progress_{date}.gif", GIF_1X1)
+        _write_once(visuals / f"{date}_site.png", PNG_1X1)
+    _write_once(visuals / "iitmlogo.png", PNG_1X1)
+    _write_once(visuals / "Siteimage.png", PNG_1X1)
+    return root
+
+
+def write_portfolio(root, n_sites, rows, seed=0):
+    """n_sites sites with EVA and milestone workbooks under root, plus root/sites.json."""
+    root = Path(root)
+    entries = []
+    for i in range(n_sites):
+        key = f"site{i:03d}"
+        data = root / "sites" / key / "data"
+        data.mkdir(parents=True, exist_ok=True)
+        if not (data / "EVA_Analysis.xlsx").exists():
+            with_legacy_columns(synthetic_eva(rows, seed + i)).to_excel(data / "EVA_Analysis.xlsx", index=False)
+        if not (data / "Milestone.xlsx").exists():
+            synthetic_milestones(rows, seed + i).to_excel(data / "Milestone.xlsx", index=False)
+        entries.append({"key": key, "name": f"Site {i:03d}", "lat": 12.98975, "lon": 80.230093})
+    (root / "sites.json").write_text(json.dumps({"sites": entries}, indent=1))
+    return root
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("out_dir")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    write_site(args.out_dir, args.rows, args.seed)
+    print(f"Wrote {args.rows:,}-row site to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Headless per-page performance benchmark for dashboard.py.
+
+    python benchmarks/run_pages.py --rows 1000 10000 100000
+    python benchmarks/run_pages.py --compare bench_results/OLD.json bench_results/NEW.json
+
+For each row count a seeded synthetic site is generated (and reused on later
+runs), open-meteo is replaced by a local stub, and every page is driven
+through Streamlit's AppTest. Per page it records:
+
+  cold_ms          first render with empty caches (includes Excel parsing)
+  rerun_ms         median / p95 of warm reruns
+  peak_mem_mb      tracemalloc peak during a cold render
+  payload_bytes    serialized size of the element tree sent to the browser
+
+plus the raw pd.read_excel time of each workbook. Results are written as JSON
+to bench_results/<commit>.json; --compare prints per-metric ratios between two
+result files and exits non-zero when any metric regressed past --threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+REPO = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO))
+
+from generate import write_site  # noqa: E402
+from stubs import WeatherStub  # noqa: E402
+
+PAGES = [
+    "Home",
+    "Progress Monitoring",
+    "Earned Value Analysis",
+    "Milestone Tracker",
+    "Financial Overview",
+    "Precast Element Status",
+    "As Planned",
+    "Site Map",
+]
+METRICS = ["cold_ms", "rerun_ms", "rerun_p95_ms", "peak_mem_mb", "payload_bytes"]
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def clear_caches():
+    import streamlit as st
+    from frame_cache import frame_cache
+
+    frame_cache.invalidate()
+    st.cache_resource.clear()
+    st.cache_data.clear()
+
+
+def payload_bytes(node):
+    """Serialized protobuf size of every element/block under an AppTest tree node."""
+    proto = getattr(node, "proto", None)
+    size = proto.ByteSize() if hasattr(proto, "ByteSize") else 0
+    children = getattr(node, "children", None) or {}
+    return size + sum(payload_bytes(child) for child in children.values())
+
+
+def run_page(page, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(REPO / "dashboard.py"), default_timeout=timeout)
+    at.session_state["page"] = page
+    t0 = time.perf_counter()
+    at.run()
+    return at, (time.perf_counter() - t0) * 1e3
+
+
+def bench_page(page, reruns, timeout):
+    clear_caches()
+    at, cold_ms = run_page(page, timeout)
+
+    clear_caches()
+    tracemalloc.start()
+    run_page(page, timeout)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    samples = []
+    for _ in range(reruns):
+        t0 = time.perf_counter()
+        at.run()
+        samples.append((time.perf_counter() - t0) * 1e3)
+    samples.sort()
+    return {
+        "page": page,
+        "cold_ms": round(cold_ms, 2),
+        "rerun_ms": round(statistics.median(samples), 2),
+        "rerun_p95_ms": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 2),
+        "peak_mem_mb": round(peak / 2**20, 2),
+        "payload_bytes": payload_bytes(at._tree),
+        "exceptions": [str(e.value)[:300] for e in at.exception],
+    }
+
+
+def excel_parse_ms(site):
+    timings = {}
+    for path in sorted((site / "data").glob("*.xlsx")):
+        t0 = time.perf_counter()
+        pd.read_excel(path, engine="openpyxl")
+        timings[path.name] = round((time.perf_counter() - t0) * 1e3, 2)
+    return timings
+
+
+def run(args):
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "streamlit": __import__("streamlit").__version__,
+            "reruns": args.reruns,
+        },
+        "excel_parse_ms": {},
+        "pages": [],
+    }
+    cwd = os.getcwd()
+    with WeatherStub() as weather:
+        os.environ["DASHBOARD_WEATHER_URL"] = weather.url
+        for rows in args.rows:
+            site = write_site(Path(args.work_dir) / f"site_{rows}", rows, args.seed).resolve()
+            results["excel_parse_ms"][str(rows)] = excel_parse_ms(site)
+            os.chdir(site)
+            try:
+                for page in args.pages:
+                    record = dict(rows=rows, **bench_page(page, args.reruns, args.timeout))
+                    results["pages"].append(record)
+                    flag = " !" if record["exceptions"] else ""
+                    print(f"{rows:>7} {page:<24} cold {record['cold_ms']:9.1f} ms  rerun {record['rerun_ms']:8.1f} ms  "
+                          f"peak {record['peak_mem_mb']:8.1f} MB  payload {record['payload_bytes']:>10,} B{flag}")
+            finally:
+                os.chdir(cwd)
+
+    out = Path(args.out or REPO / "bench_results" / f"{results['meta']['commit']}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2))
+    print(f"Wrote {out}")
+
+
+def compare(old_path, new_path, threshold):
+    old, new = (json.loads(Path(p).read_text()) for p in (old_path, new_path))
+    baseline = {(r["rows"], r["page"]): r for r in old["pages"]}
+    regressions = 0
+    print(f"{old['meta']['commit']} -> {new['meta']['commit']}")
+    for record in new["pages"]:
+        before = baseline.get((record["rows"], record["page"]))
+        if before is None:
+            continue
+        cells = []
+        for metric in METRICS:
+            a, b = before[metric], record[metric]
+            ratio = b / a if a else float("inf") if b else 1.0
+            worse = ratio > 1 + threshold
+            regressions += worse
+            cells.append(f"{metric} {ratio:5.2f}x{'!' if worse else ' '}")
+        print(f"{record['rows']:>7} {record['page']:<24} " + "  ".join(cells))
+    print(f"{regressions} metric(s) regressed by more than {threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--pages", nargs="+", default=PAGES)
+    parser.add_argument("--reruns", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=600, help="seconds per AppTest run")
+    parser.add_argument("--work-dir", default=str(REPO / "bench_results" / "sites"))
+    parser.add_argument("--out", help="result JSON path (default bench_results/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    parser.add_argument("--threshold", type=float, default=0.10, help="regression tolerance for --compare")
+    args = parser.parse_args(argv)
+    if args.compare:
+        sys.exit(compare(*args.compare, args.threshold))
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
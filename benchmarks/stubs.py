@@ -0,0 +1,161 @@
+"""
+Local stand-ins for the dashboard's outbound HTTP dependencies.
+
+    with WeatherStub() as stub:
+        os.environ["DASHBOARD_WEATHER_URL"] = stub.url
+        ...
+
+Each stub is a ThreadingHTTPServer on 127.0.0.1 with an ephemeral port,
+served from a daemon thread and shut down on exit. `requests` counts the
+calls it received.
+
+CameraStub plays a site camera: an MJPEG stream or single JPEG snapshots of
+numbered test frames, for exercising the CCTV relay. camera_frames(thumbnail=True)
+embeds a JFIF thumbnail (a complete JPEG, EOI marker included) in each frame,
+as many cameras do.
+"""
+import io
+import json
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FORECAST = {
+    "current_weather": {"temperature": 31.4, "windspeed": 9.2, "weathercode": 1},
+    "daily": {
+        "time": ["2025-03-17", "2025-03-18", "2025-03-19"],
+        "temperature_2m_max": [33.1, 33.8, 32.9],
+        "temperature_2m_min": [25.2, 25.6, 25.0],
+        "sunrise": ["2025-03-17T06:16", "2025-03-18T06:15", "2025-03-19T06:15"],
+        "sunset": ["2025-03-17T18:18", "2025-03-18T18:18", "2025-03-19T18:18"],
+        "precipitation_sum": [0.0, 1.2, 0.0],
+    },
+}
+
+
+class StubServer:
+    path = "/"
+
+    def __init__(self):
+        self.requests = 0
+        self.closed = False
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}{self.path}"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests += 1
+                stub.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def handle(self, request):
+        raise NotImplementedError
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.closed = True
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class WeatherStub(StubServer):
+    """Answers any GET with a fixed open-meteo style forecast."""
+    path = "/v1/forecast"
+
+    def handle(self, request):
+        body = json.dumps(FORECAST).encode()
+        request.send_response(200)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+
+def _jpeg(im, quality=80):
+    buf = io.BytesIO()
+    im.save(buf, "JPEG", quality=quality)
+    return buf.getvalue()
+
+
+def camera_frames(count=8, size=(640, 360), thumbnail=False):
+    """count distinct JPEG frames, each with its number drawn on it."""
+    from PIL import Image, ImageDraw
+
+    frames = []
+    for i in range(count):
+        im = Image.new("RGB", size, (40 + 25 * i % 200, 70, 83))
+        ImageDraw.Draw(im).text((20, 20), f"frame {i}", fill="white")
+        data = _jpeg(im)
+        if thumbnail:
+            # JFIF extension APP0 segment ("JFXX", format 0x10) holding a JPEG thumbnail,
+            # placed after the JFIF APP0 segment that follows SOI
+            thumb = _jpeg(im.resize((size[0] // 8, size[1] // 8)), quality=60)
+            app0_end = 4 + struct.unpack(">H", data[4:6])[0]
+            segment = b"\xff\xe0" + struct.pack(">H", 8 + len(thumb)) + b"JFXX\x00\x10" + thumb
+            data = data[:app0_end] + segment + data[app0_end:]
+        frames.append(data)
+    return frames
+
+
+class CameraStub(StubServer):
+    """
+    A site camera. mode "mjpeg" streams multipart/x-mixed-replace frames at
+    fps until the client hangs up; mode "snapshot" answers each GET with the
+    next single JPEG. `streams` counts the clients currently connected.
+    """
+    path = "/video"
+    boundary = "frame"
+
+    def __init__(self, mode="mjpeg", fps=10, frames=None):
+        super().__init__()
+        self.mode = mode
+        self.fps = fps
+        self.frames = frames or camera_frames()
+        self.sent = 0
+        self.streams = 0
+
+    def _next(self):
+        frame = self.frames[self.sent % len(self.frames)]
+        self.sent += 1
+        return frame
+
+    def handle(self, request):
+        if self.mode == "snapshot":
+            body = self._next()
+            request.send_response(200)
+            request.send_header("Content-Type", "image/jpeg")
+            request.send_header("Content-Length", str(len(body)))
+            request.end_headers()
+            request.wfile.write(body)
+            return
+        request.send_response(200)
+        request.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={self.boundary}")
+        request.end_headers()
+        self.streams += 1
+        try:
+            while not self.closed:
+                body = self._next()
+                request.wfile.write(f"--{self.boundary}\r\nContent-Type: image/jpeg\r\n"
+                                    f"Content-Length: {len(body)}\r\n\r\n".encode())
+                request.wfile.write(body + b"\r\n")
+                request.wfile.flush()
+                time.sleep(1 / self.fps)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.streams -= 1
@@ -0,0 +1,239 @@
+"""
+Shared CCTV relay for the Home page.
+
+The site camera copes with a handful of clients at most, so the dashboard
+keeps exactly one upstream connection per camera, however many sessions are
+watching. The latest frame is kept as one immutable bytes object, and every
+session gets that same object, never a copy.
+
+Two upstream modes:
+  mjpeg      one long-lived multipart/x-mixed-replace stream; each part is
+             cut out by its boundary and Content-Length header (up to the
+             next boundary without one). Only a stream whose Content-Type
+             names no boundary is split at JPEG SOI/EOI markers, which cut
+             short frames carrying an embedded EXIF/JFIF thumbnail
+  snapshot   a plain JPEG endpoint polled every `interval` seconds
+  auto       (default) decide from the Content-Type of the first response
+
+Frames are kept at most max_fps times a second; the rest of the stream is
+read and dropped. The relay only runs while somebody is looking: the reader
+thread starts on the first latest() call and disconnects after IDLE_AFTER
+seconds without one. thumbnail() shows the frame in a st.fragment that
+reruns every REFRESH seconds, so the rest of the page never reruns for it.
+
+Environment:
+  DASHBOARD_CCTV_URL        stream/snapshot URL of the built-in site (others: cctv_url in sites.json)
+  DASHBOARD_CCTV_MODE       auto | mjpeg | snapshot (default auto)
+  DASHBOARD_CCTV_FPS        frames kept per second (default 2)
+  DASHBOARD_CCTV_REFRESH    seconds between thumbnail updates in a session (default 2)
+"""
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+
+import requests
+import streamlit as st
+
+import metrics
+
+DEFAULT_URL = os.environ.get("DASHBOARD_CCTV_URL")
+DEFAULT_MODE = os.environ.get("DASHBOARD_CCTV_MODE", "auto")
+DEFAULT_FPS = float(os.environ.get("DASHBOARD_CCTV_FPS", "2"))
+REFRESH = float(os.environ.get("DASHBOARD_CCTV_REFRESH", "2"))
+IDLE_AFTER = 30.0      # seconds without a viewer before the upstream is dropped
+RETRY_AFTER = 5.0      # seconds between reconnect attempts
+CHUNK = 64 * 1024
+MAX_BUFFER = 8 * 2**20  # give up on a stream that never closes a frame
+
+SOI, EOI = b"\xff\xd8", b"\xff\xd9"
+BOUNDARY = re.compile(r'boundary="?([^";]+)"?', re.IGNORECASE)
+
+# data: JPEG bytes (shared, immutable), seq: frame counter, ts: time.time() it arrived
+Frame = namedtuple("Frame", ["data", "seq", "ts"])
+# frame: latest Frame or None, connected: upstream open, error: last failure message
+RelayStatus = namedtuple("RelayStatus", ["frame", "connected", "error"])
+
+
+def stream_boundary(content_type):
+    """Multipart boundary (bytes, without leading dashes) named by a Content-Type, or None."""
+    match = BOUNDARY.search(content_type or "")
+    return match.group(1).strip().lstrip("-").encode("latin-1") if match else None
+
+
+def _part_headers(block):
+    headers = {}
+    for line in bytes(block).split(b"\r\n"):
+        name, sep, value = line.partition(b":")
+        if sep:
+            headers[name.strip().lower().decode("latin-1")] = value.strip().decode("latin-1")
+    return headers
+
+
+def split_parts(buffer, boundary):
+    """Cut complete multipart bodies out of a bytearray; returns (frames, bytes consumed)."""
+    delimiter = b"--" + boundary
+    frames, pos = [], 0
+    while True:
+        start = buffer.find(delimiter, pos)
+        if start < 0:
+            # Keep a tail that could be the start of a split delimiter
+            return frames, max(pos, len(buffer) - len(delimiter) + 1, 0)
+        head_end = buffer.find(b"\r\n\r\n", start)
+        if head_end < 0:
+            return frames, start
+        length = _part_headers(buffer[start + len(delimiter):head_end]).get("content-length", "")
+        body = head_end + 4
+        if length.isdigit():
+            end = body + int(length)
+            if end > len(buffer):
+                return frames, start
+            frames.append(bytes(buffer[body:end]))
+        else:
+            # No length: the body runs to the next delimiter, less the CRLF before it
+            end = buffer.find(delimiter, body)
+            if end < 0:
+                return frames, start
+            data = bytes(buffer[body:end])
+            frames.append(data[:-2] if data.endswith(b"\r\n") else data)
+        pos = end
+
+
+def split_jpegs(buffer):
+    """Cut complete JPEGs out of a bytearray at their markers; returns (frames, bytes consumed)."""
+    frames, pos = [], 0
+    while True:
+        start = buffer.find(SOI, pos)
+        if start < 0:
+            return frames, len(buffer) if len(buffer) < 2 else len(buffer) - 1
+        end = buffer.find(EOI, start + 2)
+        if end < 0:
+            return frames, start
+        frames.append(bytes(buffer[start:end + 2]))
+        pos = end + 2
+
+
+class CameraRelay:
+    def __init__(self, url, mode=DEFAULT_MODE, max_fps=DEFAULT_FPS, interval=None, timeout=10):
+        self.url = url
+        self.mode = mode
+        self.min_gap = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.interval = interval if interval is not None else max(self.min_gap, 0.5)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._frame = None
+        self._seq = 0
+        self._last_viewer = 0.0
+        self._thread = None
+        self._connected = False
+        self._error = None
+        self.connections = 0   # upstream connections opened over the relay's life
+
+    def latest(self):
+        """The newest frame (or None), starting the upstream reader if it is not running."""
+        with self._lock:
+            self._last_viewer = time.monotonic()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="cctv-relay", daemon=True)
+                self._thread.start()
+            return self._frame
+
+    def status(self):
+        with self._lock:
+            return RelayStatus(self._frame, self._connected, self._error)
+
+    def _idle(self):
+        return time.monotonic() - self._last_viewer > IDLE_AFTER
+
+    def _publish(self, data):
+        with self._lock:
+            if self._frame is not None and time.time() - self._frame.ts < self.min_gap:
+                return
+            self._seq += 1
+            self._frame = Frame(data, self._seq, time.time())
+        metrics.incr("cctv_frames")
+
+    def _run(self):
+        try:
+            while not self._idle():
+                try:
+                    self._connect()
+                except Exception as exc:
+                    metrics.incr("cctv_errors")
+                    with self._lock:
+                        self._error = str(exc) or exc.__class__.__name__
+                finally:
+                    with self._lock:
+                        self._connected = False
+                if not self._idle():
+                    time.sleep(RETRY_AFTER)
+        finally:
+            with self._lock:
+                self._thread = None
+
+    def _connect(self):
+        # A plain requests.get (no pooled session): the stream connection is ours alone
+        with requests.get(self.url, stream=True, timeout=self.timeout) as resp:
+            resp.raise_for_status()
+            self.connections += 1
+            with self._lock:
+                self._connected = True
+                self._error = None
+            ctype = resp.headers.get("Content-Type", "")
+            if self.mode == "mjpeg" or (self.mode == "auto" and ctype.startswith("multipart/")):
+                self._read_stream(resp, stream_boundary(ctype))
+                return
+            self._publish(resp.content)
+        self._poll_snapshots()
+
+    def _read_stream(self, resp, boundary=None):
+        buffer = bytearray()
+        for chunk in resp.iter_content(CHUNK):
+            if self._idle():
+                return
+            metrics.incr("cctv_bytes", len(chunk))
+            buffer += chunk
+            frames, used = split_parts(buffer, boundary) if boundary else split_jpegs(buffer)
+            del buffer[:used]
+            if frames:
+                self._publish(frames[-1])  # only the newest complete frame matters
+            if len(buffer) > MAX_BUFFER:
+                raise ValueError("no JPEG frame boundary in the camera stream")
+
+    def _poll_snapshots(self):
+        while not self._idle():
+            time.sleep(self.interval)
+            resp = requests.get(self.url, timeout=self.timeout)
+            resp.raise_for_status()
+            metrics.incr("cctv_bytes", len(resp.content))
+            self._publish(resp.content)
+
+
+_relays = {}
+_relays_lock = threading.Lock()
+
+
+def get_relay(url=DEFAULT_URL):
+    """Process-wide CameraRelay for url."""
+    with _relays_lock:
+        relay = _relays.get(url)
+        if relay is None:
+            relay = _relays[url] = CameraRelay(url)
+        return relay
+
+
+@st.fragment(run_every=REFRESH)
+def thumbnail(url):
+    """Inline camera thumbnail that refreshes itself without rerunning the page."""
+    relay = get_relay(url)
+    frame = relay.latest()
+    status = relay.status()
+    if frame is None:
+        st.caption("Connecting to camera…" if status.error is None else f"Camera unavailable ({status.error})")
+        return
+    # Same bytes object for every session; Streamlit serves identical frames under one media URL
+    st.image(frame.data, use_container_width=True)
+    updated = f"Updated {time.time() - frame.ts:.0f} s ago"
+    st.caption(updated if status.connected else f"⚠️ {updated} (reconnecting)")
+    metrics.incr("cctv_views")
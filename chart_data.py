@@ -0,0 +1,114 @@
+"""
+Server-side reduction of chart data before it is handed to st.*_chart.
+
+Streamlit ships every row of a chart's data to the browser as Vega data, so a
+large schedule means multi-MB websocket messages. These helpers cut the data
+down to what can actually be seen:
+
+  - downsample_lines  shape-preserving LTTB per series (S-curve)
+  - aggregate_bars    daily / weekly / monthly buckets on a date index
+  - top_n             the N largest values (worst delays)
+  - bin_scatter       2-D histogram once a scatter passes a point threshold
+
+Each returns the reduced data together with the original point count so the
+page can say how much was dropped (see reduction_caption).
+"""
+import numpy as np
+import pandas as pd
+
+import metrics
+
+MAX_LINE_POINTS = 1500
+MAX_BARS = 400
+SCATTER_THRESHOLD = 5000
+
+BUCKETS = {"Daily": "D", "Weekly": "W", "Monthly": "M"}
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of n_out points that keep the line's shape."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    # Bucket edges for the n - 2 interior points; first and last are always kept
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        # Average of the next bucket is the third triangle vertex
+        avg_x = x[nxt_lo:nxt_hi].mean()
+        avg_y = np.nanmean(y[nxt_lo:nxt_hi]) if nxt_hi > nxt_lo else y[-1]
+        seg_x, seg_y = x[lo:hi], y[lo:hi]
+        area = np.abs((x[prev] - avg_x) * (seg_y - y[prev]) - (x[prev] - seg_x) * (avg_y - y[prev]))
+        prev = lo + int(np.nanargmax(area)) if np.isfinite(area).any() else lo
+        out[i + 1] = prev
+    return out
+
+
+def _numeric_x(index):
+    if isinstance(index, pd.DatetimeIndex):
+        return index.asi8.astype("float64")
+    if pd.api.types.is_numeric_dtype(index):
+        return np.asarray(index, dtype="float64")
+    return np.arange(len(index), dtype="float64")
+
+
+def downsample_lines(df, max_points=MAX_LINE_POINTS):
+    """Keep at most ~max_points rows, chosen by LTTB on each column (union of picks)."""
+    total = len(df)
+    if total <= max_points or df.shape[1] == 0:
+        metrics.incr("chart_points", total)
+        return df, total
+    x = _numeric_x(df.index)
+    per_series = max(max_points // df.shape[1], 3)
+    keep = np.unique(np.concatenate([lttb_indices(x, df[col].to_numpy("float64"), per_series)
+                                     for col in df.columns]))
+    metrics.incr("chart_points", len(keep))
+    return df.iloc[keep], total
+
+
+def aggregate_bars(data, bucket, how="sum"):
+    """Aggregate a date-indexed Series/DataFrame into Daily/Weekly/Monthly buckets."""
+    periods = data.index.to_period(BUCKETS[bucket])
+    out = data.groupby(periods).agg(how)
+    out.index = out.index.to_timestamp()
+    metrics.incr("chart_points", len(out))
+    return out, len(data)
+
+
+def top_n(series, n=50):
+    """The n largest values, largest first (e.g. the worst delays)."""
+    out = series.nlargest(n)
+    metrics.incr("chart_points", len(out))
+    return out, len(series)
+
+
+def bin_scatter(df, x, y, bins=60, threshold=SCATTER_THRESHOLD):
+    """Below threshold return df unchanged; above it, a Count per occupied 2-D bin."""
+    total = len(df)
+    if total <= threshold:
+        metrics.incr("chart_points", total)
+        return df, total
+    xs = df[x].to_numpy("float64")
+    ys = df[y].to_numpy("float64")
+    finite = np.isfinite(xs) & np.isfinite(ys)
+    counts, x_edges, y_edges = np.histogram2d(xs[finite], ys[finite], bins=bins)
+    ix, iy = np.nonzero(counts)
+    binned = pd.DataFrame({
+        x: (x_edges[ix] + x_edges[ix + 1]) / 2,
+        y: (y_edges[iy] + y_edges[iy + 1]) / 2,
+        "Count": counts[ix, iy].astype(np.int64),
+    })
+    metrics.incr("chart_points", len(binned))
+    return binned, total
+
+
+def reduction_caption(shown, total, unit="points"):
+    if shown >= total:
+        return f"{total:,} {unit}"
+    return f"Showing {shown:,} of {total:,} {unit} ({total - shown:,} reduced server-side)"
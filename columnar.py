@@ -0,0 +1,187 @@
+"""
+Columnar copies of the workbooks, written by precompute.py.
+
+For every <data_dir>/<name>.xlsx the precompute step writes, under
+<data_dir>/.precomputed/:
+
+  <name>.arrow              the sheet as an uncompressed Arrow IPC (Feather v2)
+                            file, with Date columns parsed, numeric text
+                            columns coerced to numbers and repeated text
+                            stored as dictionaries (categoricals)
+  <name>.<aggregate>.arrow  derived series (S-curve, delays) for the pages
+  manifest.json             per workbook: sha1, mtime_ns and size of the source
+                            it was built from, and the files written for it
+
+At runtime a workbook is served from its Arrow file only while the source's
+mtime and size still match the manifest. The file is memory-mapped, so
+numeric columns are paged in by the OS instead of parsed. Anything missing,
+stale or unreadable falls back to parsing the Excel file, normalized the same
+way, so both paths give identical frames. pyarrow is optional; without it
+everything is read from Excel as before.
+"""
+import json
+import os
+import re
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from eva_engine import RAW_COLUMNS, compute_eva
+
+try:
+    import pyarrow as pa
+except ImportError:  # no pyarrow: Excel only
+    pa = None
+
+OUT_DIR = ".precomputed"
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 2   # 2: text stored compact
+# read_excel options a columnar file already satisfies (dates are parsed at precompute time)
+COMPATIBLE_KWARGS = {"engine", "parse_dates"}
+NUMERIC_PATTERN = re.compile(r"cost|amount|price|value|qty|quantity|percent|%", re.IGNORECASE)
+
+_lock = threading.Lock()
+_manifests = {}   # manifest path -> ((mtime_ns, size), entries)
+
+
+def _lossless(converted, original):
+    # Accept a conversion only if it turned no value into NaN/NaT
+    return converted.notna().sum() >= original.notna().sum()
+
+
+def normalize(frame):
+    """Parsed dates and numeric cost columns; other columns are left as read."""
+    out = {}
+    for name, col in frame.items():
+        text = pd.api.types.is_object_dtype(col) or pd.api.types.is_string_dtype(col)
+        if str(name).lower().endswith("date") and not pd.api.types.is_datetime64_any_dtype(col):
+            converted = pd.to_datetime(col, errors="coerce")
+            col = converted if _lossless(converted, col) else col
+        elif text and NUMERIC_PATTERN.search(str(name)):
+            converted = pd.to_numeric(col, errors="coerce")
+            col = converted if _lossless(converted, col) else col
+        out[name] = col
+    return pd.DataFrame(out)
+
+
+def derive(frame):
+    """{aggregate name: frame} of the derived series that apply to this sheet."""
+    aggregates = {}
+    if "Planned Date" in frame.columns and "Actual Date" in frame.columns:
+        # Same order compute_eva (and so the EVA page) puts activities in
+        ordered = frame.assign(**{c: pd.to_datetime(frame[c], errors="coerce")
+                                  for c in ("Planned Date", "Actual Date")})
+        ordered = ordered.sort_values("Planned Date", kind="stable", ignore_index=True)
+        delays = pd.DataFrame({"Planned Date": ordered["Planned Date"]})
+        if "Activities" in ordered.columns:
+            delays["Activities"] = ordered["Activities"]
+        delays["Delay Days"] = (ordered["Actual Date"] - ordered["Planned Date"]).dt.days.astype("float64")
+        aggregates["delays"] = delays
+    if all(c in frame.columns for c in RAW_COLUMNS):
+        # The cumulative baseline, earned and actual curves do not depend on the status date
+        try:
+            eva = compute_eva(frame)
+        except ValueError:   # percentages off the configured scale; the EVA page reports it
+            return aggregates
+        aggregates["scurve"] = eva[["Planned Date", "Cum Planned", "Cum BCWP", "Cum ACWP"]]
+    return aggregates
+
+
+def out_dir(source):
+    return Path(source).parent / OUT_DIR
+
+
+def table_path(source, aggregate=None):
+    source = Path(source)
+    suffix = f".{aggregate}.arrow" if aggregate else ".arrow"
+    return out_dir(source) / f"{source.stem}{suffix}"
+
+
+def read_manifest(folder):
+    """{workbook name: entry} from folder's manifest, re-read only when it changes."""
+    path = Path(folder) / MANIFEST
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return {}
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        cached = _manifests.get(str(path))
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+    try:
+        manifest = json.loads(path.read_text())
+        entries = manifest["files"] if manifest.get("version") == FORMAT_VERSION else {}
+    except (OSError, ValueError, KeyError):
+        entries = {}
+    with _lock:
+        _manifests[str(path)] = (stamp, entries)
+    return entries
+
+
+def fresh(source, aggregate=None):
+    """Path of source's Arrow file (or derived aggregate) if it is up to date, else None."""
+    if pa is None:
+        return None
+    source = Path(source)
+    entry = read_manifest(out_dir(source)).get(source.name)
+    if entry is None:
+        return None
+    try:
+        stat = source.stat()
+    except FileNotFoundError:
+        return None
+    if (stat.st_mtime_ns, stat.st_size) != (entry["mtime_ns"], entry["size"]):
+        return None
+    name = table_path(source, aggregate).name
+    if name not in entry["outputs"]:
+        return None
+    path = out_dir(source) / name
+    return path if path.exists() else None
+
+
+def read_table(path):
+    """Memory-mapped Arrow file as a DataFrame (numeric columns without nulls stay mapped)."""
+    with pa.memory_map(str(path)) as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True)
+
+
+def write_table(frame, path):
+    """Write frame as an uncompressed Arrow IPC file, atomically."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table = pa.Table.from_pandas(frame.reset_index(drop=True), preserve_index=False)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, path)
+
+
+def write_manifest(folder, entries):
+    path = Path(folder) / MANIFEST
+    tmp = path.with_name(f".{MANIFEST}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({"version": FORMAT_VERSION, "files": entries}, indent=2, sort_keys=True))
+    os.replace(tmp, path)
+
+
+def compatible(kwargs):
+    return set(kwargs) <= COMPATIBLE_KWARGS
+
+
+def load(source, **kwargs):
+    """source's columnar frame if it is fresh and satisfies kwargs, else None."""
+    if not isinstance(source, (str, os.PathLike)) or not compatible(kwargs):
+        return None
+    path = fresh(source)
+    if path is None:
+        return None
+    try:
+        frame = read_table(path)
+    except (OSError, pa.ArrowException):
+        return None
+    for col in kwargs.get("parse_dates") or ():
+        if col in frame.columns and not pd.api.types.is_datetime64_any_dtype(frame[col]):
+            frame[col] = pd.to_datetime(frame[col], errors="coerce")
+    return frame
@@ -1,13 +1,28 @@
 import streamlit as st  # Core Streamlit functionality
 import pandas as pd      # Data handling
-import requests          # HTTP requests for APIs
 import datetime          # Date and time handling
 import base64            # Encoding images to base64
+import os                # Environment configuration
 from pathlib import Path # Filesystem paths
-from streamlit_autorefresh import st_autorefresh  # Auto-refresh widgets
-import altair as alt      # Advanced plotting (if needed)
-import altair as alt
-from pathlib import Path
+import metrics           # Hot-path timings, counters and profiling
+from streamlit.runtime.scriptrunner import get_script_run_ctx  # Session id for metrics
+from frame_cache import frame_cache, read_derived_cached, read_excel_cached, source_key  # Shared, memory-bounded workbook cache
+from eva_engine import compute_eva, rollup_period, rollup_wbs, summarize  # Vectorized EVA
+from tables import paged_table  # Server-side paged tables
+from snapshots import get_catalog  # Auto-discovered progress snapshots
+from timeline import get_timeline  # Windowed milestone Gantt engine
+from watcher import WATCH_INTERVAL, can_push, get_change_feed  # File watcher, cache invalidation and push reruns
+from sites import DEFAULT_SITE, EVA_FILE, MILESTONE_FILE, load_manifest, portfolio, portfolio_totals  # Multi-site manifest
+import media           # Resized WebP/MP4 variants of photos and GIFs
+from element_store import get_store  # Indexed precast element inventory
+from embeds import lite_mode_toggle, map_embed_url, viewer, viewer_group  # Deferred Speckle/Maps embeds
+import cctv            # Shared CCTV relay (one upstream connection per camera)
+from columnar import derive  # Derived S-curve/delay series
+from session_memory import get_session_memory  # Per-session memory report and budget
+from chart_data import (BUCKETS, MAX_BARS, aggregate_bars, bin_scatter,  # Chart data reduction
+                        downsample_lines, reduction_caption, top_n)
+# requests (weather) and altair are imported inside the pages
+# (or helpers) that use them, so they only load on first use of that page.
 
 
 # ─────────────────────────────────────────────────────────┐
@@ -15,25 +30,20 @@ from pathlib import Path
 # ─────────────────────────────────────────────────────────┘
 st.set_page_config(page_title="Mockup Site Digital Twin Dashboard", layout="wide")
 
-# ─────────────────────────────────────────────────────────────────────────────┐
-# 1. Load & Encode Logo                                                     |
-#    - Read logo file, error out if missing                                       |
-#    - Convert to base64 so we can embed in HTML                                |
-# ─────────────────────────────────────────────────────────────────────────────┘
-logo_path = Path("visuals/iitmlogo.png")
-if not logo_path.exists():
-    st.error(f"Logo not found at {logo_path}")
-    st.stop()
-logo_bytes = logo_path.read_bytes()
-logo_b64 = base64.b64encode(logo_bytes).decode()
+# Optional Prometheus/JSON-lines endpoint, started once per process
+if os.environ.get("DASHBOARD_METRICS_PORT"):
+    metrics.start_http_server(os.environ["DASHBOARD_METRICS_PORT"],
+                              os.environ.get("DASHBOARD_METRICS_HOST", "127.0.0.1"))
+# Admin/debug panel (other sessions' memory, profiler output): server-side DASHBOARD_DEBUG=1 only
+debug = os.environ.get("DASHBOARD_DEBUG") == "1"
 
 # ─────────────────────────────────────────────────────────────────────────────┐
-# 2. Build Header HTML                                                        |
+# 1. Build Header HTML                                                        |
 #    - Gold ribbon background, dark-brown border                                |
 #    - Overlapping logo image                                                   |
 #    - Main title and subtitle ribbon                                           |
 # ─────────────────────────────────────────────────────────────────────────────┘
-header_html = f"""
+header_template = """
 <div style="
     position: relative;
     background: #E9C46A;           /* Gold */
@@ -82,126 +92,161 @@ header_html = f"""
   </div>
 </div>
 """
+
+# ─────────────────────────────────────────────────────────────────────────────┐
+# 2. Load & Encode Logo                                                     |
+#    - Read logo file once per process (not once per rerun)                     |
+#    - Convert to base64 so we can embed in HTML                                |
+# ─────────────────────────────────────────────────────────────────────────────┘
+logo_path = Path("visuals/iitmlogo.png")
+
+@st.cache_resource(show_spinner=False)
+def load_header_html(logo_path):
+    # Returns None when the logo is missing so the caller can stop the app
+    if not logo_path.exists():
+        return None
+    logo_b64 = base64.b64encode(logo_path.read_bytes()).decode()
+    return header_template.format(logo_b64=logo_b64)
+
+header_html = load_header_html(logo_path)
+if header_html is None:
+    st.error(f"Logo not found at {logo_path}")
+    st.stop()
 st.components.v1.html(header_html, height=140)
 
 # ─────────────────────────────────────────────────────────┐
-# 3. Navigation Buttons                                    |
-#    - Define sections with icons                           |
-#    - On click, set session_state.page                     |
+# 3. Shared Data & Assets                                   |
+#    - Active site from the site manifest                    |
+#    - Progress snapshot catalog                             |
+#    - Speckle model and map embed URLs                      |
+#    - Anything expensive is cached once per process and     |
+#      only computed by the pages that need it               |
 # ─────────────────────────────────────────────────────────┘
-sections = [
-    ("Progress Monitoring", "🏗️"),
-    ("Earned Value Analysis", "📊"),
-    ("Milestone Tracker", "🎯"),
-    ("Financial Overview(TBD)", "💰"),
-    ("Precast Element Status(TBD)", "📦"),
-    ("As Planned", "🧱"),
-    ("Site Map", "🗺️"),
-]
-nav_cols = st.columns(len(sections), gap="small")
-for (name, icon), col in zip(sections, nav_cols):
-    with col:
-        if st.button(f"{icon}  {name}", key=name):
-            st.session_state.page = name
-st.markdown("---")
+# Sites come from sites.json (see sites.py); without one, the built-in mockup site
+site_manifest = load_manifest()
+if len(site_manifest.sites) > 1:
+    st.sidebar.selectbox("Site", list(site_manifest.sites), key="site",
+                         format_func=lambda key: site_manifest.sites[key].name)
+site = site_manifest.sites.get(st.session_state.get("site")) or next(iter(site_manifest.sites.values()))
+data_dir, visuals_dir = Path(site.data_dir), Path(site.visuals_dir)
 
-# ─────────────────────────────────────────────────────────┐
-# 4. Shared Data & Assets                                   |
-#    - Progress data paths and GIFs                          |
-#    - Speckle model URLs                                    |
-#    - Default EVA data                                       |
-#    - Milestone, financial, and precast DataFrames           |
-# ─────────────────────────────────────────────────────────┘
-prog_excels = {
-    "06 Feb": "data/progress_06feb.xlsx",
-    "08 Mar": "data/progress_08mar.xlsx",
-    "17 Mar": "data/progress_17mar.xlsx"
-}
-prog_gifs = {
-    "06 Feb": "visuals/progress_06feb.gif",
-    "08 Mar": "visuals/progress_08mar.gif",
-    "17 Mar": "visuals/progress_17mar.gif"
-}
+# Progress snapshots are discovered from <data_dir>/progress_<date>.xlsx (see snapshots.py)
+snapshot_catalog = get_catalog(site.data_dir, site.visuals_dir)
 
-def find_site_image(key):
-    # Look for site photos matching date key
-    pattern = key.lower().replace(' ', '')
-    for f in Path("visuals").glob(f"{pattern}*"):
-        if f.suffix.lower() in [".png", ".jpg", ".jpeg"]:
-            return str(f)
-    return None
-site_images = {k: find_site_image(k) for k in prog_excels}
-
-as_planned_url = "https://app.speckle.systems/projects/a95c025094/models/7f6e8a8520?embed=true"
-as_built_urls = {
-    "06 Feb": "https://app.speckle.systems/projects/3db7806786/models/8c40f67a94?embed=true",
-    "08 Mar": "https://app.speckle.systems/projects/3db7806786/models/4b57f57c40?embed=true",
-    "17 Mar": "https://app.speckle.systems/projects/3db7806786/models/78d9e95751?embed=true"
-}
+# Background change feed (one per process): new or edited files under a site's data
+# and visuals folders drop their cached frames and rerun only the sessions that show them
+change_feed = get_change_feed()
 
-# Load default EVA if available
-try:
-    eva_raw_default = pd.read_excel("data/EVA_Analysis.xlsx", engine="openpyxl")
-except Exception:
-    eva_raw_default = None
-
-# Milestone tracker
-ms_df = pd.DataFrame([
-    ["Foundation Complete", "2025-02-15", "✅ Done"],
-    ["First Lifting Frame",   "2025-03-01", "⏳ In Progress"],
-    ["Roof Installation",      "2025-04-01", "❌ Not Started"],
-], columns=["Milestone", "Target Date", "Status"])
-
-# Financial overview
-fin_df = pd.DataFrame([
-    ["Manufacturing", 120, 95],
-    ["Transport",      30, 20],
-    ["Installation",  100, 60],
-], columns=["Category", "Planned (₹L)", "Spent (₹L)"]).set_index("Category")
-
-# Precast element status
-elem_df = pd.DataFrame([
-    ["PC-101", "Wall",   "Manufactured",       "2025-04-20"],
-    ["PC-102", "Beam",   "QA Passed",          "2025-04-22"],
-    ["PC-103", "Slab",   "Installed on Site",  "2025-04-23"],
-    ["PC-104", "Column", "QA Pending",         "2025-04-24"],
-], columns=["Element ID", "Type", "Status", "Last Updated"])
+@st.cache_resource(show_spinner=False)
+def watch_header(logo_path):
+    # Once per process (a lambda registered on every rerun would pile up): a new logo rebuilds the header
+    change_feed.on_change(logo_path.as_posix(), lambda changed: load_header_html.clear())
+
+watch_header(logo_path)
+
+# Bytes each session holds on its own (state, uploads, unshared media), with a budget
+session_memory = get_session_memory()
+
+as_planned_url = site.as_planned_url
+as_built_urls = site.as_built_urls
+drawing_url = site.drawing_url
 
 # Map coordinates for embedding
-lat, lon = 12.989750, 80.230093
+lat, lon = site.lat, site.lon
+map_url = map_embed_url(lat, lon)
 
-# Determine current page (default: Home)
-page = st.session_state.get("page", "Home")
+# Approximate pixel width of a half-page column in the wide layout; picks the media variant
+COLUMN_WIDTH = 960
+
+# Local time, ticking client-side (no reruns)
+CLOCK_HTML = """
+<div style="font-family:'Source Sans Pro',sans-serif;font-size:1rem;color:#31333F">
+  <strong>Local Time:</strong> <span id="clock"></span>
+</div>
+<script>
+const clock = document.getElementById("clock");
+const tick = () => clock.textContent = new Date().toLocaleTimeString("en-GB",
+    {timeZone: "Asia/Kolkata", hour: "2-digit", minute: "2-digit"});
+tick();
+setInterval(tick, 10000);
+</script>
+"""
+
+CARD_OPEN = '<div style="padding:1.5rem;background:white; border-radius:8px; box-shadow:0 2px 6px rgba(0,0,0,0.1);">'
+CARD_CLOSE = '</div>'
 
 # ─────────────────────────────────────────────────────────┐
-# Home Page                                              |
+# Page Loaders                                             |
+#    - Each returns the data its page renders              |
+#    - Only the active page's loader runs on a rerun       |
 # ─────────────────────────────────────────────────────────┘
-if page == "Home":
-    # Auto-refresh every minute
-    st_autorefresh(interval=60000, limit=None, key="minute-refresh")
+def load_progress():
+    snapshot_keys = snapshot_catalog.keys()
+    skipped = snapshot_catalog.skipped()
+    if skipped:
+        st.warning("Skipped progress files: " + ", ".join(f"{name} ({why})" for name, why in skipped.items()))
+    if not snapshot_keys:
+        st.error(f"No progress snapshots found in {data_dir}/ (expected progress_<date>.xlsx).")
+        st.stop()
+    return {"snapshot_keys": snapshot_keys}
 
-    # Weather & local time card
-    try:
-        api_url = (
-            f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}"  
-            "&current_weather=true"
-            "&daily=temperature_2m_max,temperature_2m_min,sunrise,sunset,precipitation_sum"
-            "&timezone=Asia/Kolkata"
-        )
-        w = requests.get(api_url, timeout=5).json()
-        cw = w.get("current_weather", {})
-        daily = w.get("daily", {})
-        dates = daily.get("time", [])
-    except Exception:
-        cw, daily, dates = {}, {}, []
+def load_milestones():
+    milestone_path = data_dir / MILESTONE_FILE
+    if not milestone_path.exists():
+        st.error(f"Milestone file not found at {milestone_path}")
+        st.stop()
+    ms_df = read_excel_cached(milestone_path,
+                              parse_dates=["Planned Date", "Actual Date"])
+    return {"ms_df": ms_df, "ms_version": source_key(milestone_path)}
+
+@st.cache_resource(show_spinner=False)
+def load_financials():
+    # Financial overview
+    fin_df = pd.DataFrame([
+        ["Manufacturing", 120, 95],
+        ["Transport",      30, 20],
+        ["Installation",  100, 60],
+    ], columns=["Category", "Planned (₹L)", "Spent (₹L)"]).set_index("Category")
+    return {"fin_df": fin_df}
+
+def load_elements():
+    # Precast element inventory (SQLite, see element_store.py); get_store keeps one store per site database
+    return {"store": get_store(site.elements_db, seed=site is DEFAULT_SITE)}  # only the demo site gets sample rows
+
+# ─────────────────────────────────────────────────────────┐
+# Home Page                                              |
+# ─────────────────────────────────────────────────────────┘
+def render_home():
+    from weather import WeatherSnapshot, get_weather_service  # Shared background weather fetcher
+
+    # No timed full-script refresh: the change feed reruns Home sessions when a new
+    # weather payload lands, and the clock below ticks in the browser
+    if lat is not None:
+        change_feed.add_poller(f"weather:{site.key}",
+                               lambda la=lat, lo=lon: get_weather_service(la, lo).get().payload)
+
+    # Weather & local time card: never waits on the network, serves the last
+    # good payload and refreshes it in the background when it is due
+    if lat is not None:
+        weather = get_weather_service(lat, lon).get()
+    else:
+        weather = WeatherSnapshot(None, None, False, "no coordinates for this site")
+    w = weather.payload or {}
+    cw = w.get("current_weather", {})
+    daily = w.get("daily", {})
+    dates = daily.get("time", [])
 
     col_w, col_cam = st.columns([2,1], gap="large")
     with col_w:
         st.markdown("### Weather & Local Time")
         if cw:
             st.markdown(f"**Temperature:** {cw['temperature']} °C")
-        now_str = datetime.datetime.now().strftime("%H:%M")
-        st.markdown(f"**Local Time:** {now_str}")
+        st.components.v1.html(CLOCK_HTML, height=32)
+        if weather.age is None:
+            st.caption("Fetching weather…" if weather.error is None else f"Weather unavailable ({weather.error})")
+        else:
+            updated = f"Weather updated {int(weather.age // 60)} min ago"
+            st.caption(f"⚠️ {updated} (stale)" if weather.stale else updated)
         st.markdown("---")
         if dates:
             selected = st.selectbox("Select date", dates, key="fc-select")
@@ -211,257 +256,539 @@ if page == "Home":
             precip = daily['precipitation_sum'][idx]
             st.markdown(f"- **Precipitation:** {precip} mm {'🌧️' if precip>0 else '☀️'}")
     with col_cam:
-        # CCTV camera feed card
-        st.markdown(
-            """
-            <div style="padding:1rem;border:1px solid #ddd;border-radius:8px;box-shadow:0 2px 6px rgba(0,0,0,0.1);text-align:center;">
-              <h3 style="margin-bottom:0.5rem;">CCTV Camera</h3>
-              <a href="http://10.21.56.110/" target="_blank" style="display:inline-block;padding:0.5rem 1rem;border-radius:4px;background:#264653;color:white;text-decoration:none;font-weight:500;">
-                Live Site ▶️
-              </a>
-            </div>
-            """, unsafe_allow_html=True)
+        # CCTV camera feed card: relayed thumbnail when a stream URL is configured,
+        # otherwise a link to the camera's own page
+        if site.cctv_url:
+            st.markdown("### CCTV Camera")
+            cctv.thumbnail(site.cctv_url)
+        elif site.cctv_page_url:
+            st.markdown(
+                f"""
+                <div style="padding:1rem;border:1px solid #ddd;border-radius:8px;box-shadow:0 2px 6px rgba(0,0,0,0.1);text-align:center;">
+                  <h3 style="margin-bottom:0.5rem;">CCTV Camera</h3>
+                  <a href="{site.cctv_page_url}" target="_blank" style="display:inline-block;padding:0.5rem 1rem;border-radius:4px;background:#264653;color:white;text-decoration:none;font-weight:500;">
+                    Live Site ▶️
+                  </a>
+                </div>
+                """, unsafe_allow_html=True)
     st.markdown("---")
     # 3D model and site photo
     col_3d, col_img = st.columns(2, gap="large")
     with col_3d:
         st.markdown("### 3D Model Viewer (As-Planned)")
-        st.components.v1.iframe(as_planned_url, height=650, scrolling=True)
+        viewer(as_planned_url, height=650, title="As-Planned model")
     with col_img:
         st.markdown("### Site Photo")
-        img_path = Path("visuals/Siteimage.png")
+        img_path = visuals_dir / "Siteimage.png"
         if img_path.exists():
-            st.image(str(img_path), use_container_width=True)
+            media.show(st, img_path, None, key="home-photo-orig", width=COLUMN_WIDTH)
         else:
             st.warning("Site photo not found.")
     st.markdown("---")
     # 2D drawing embed
     st.markdown("### 2D Drawing")
-    html_iframe = """
-      <iframe
-      src="https://app.speckle.systems/projects/970c0e268f/models/65931bb453?embed=true"
-      width="650" height="650" frameborder="0" scrolling="true">
-      </iframe>
-      """
-    st.components.v1.html(html_iframe, width=650, height=650)
- 
+    viewer(drawing_url, height=650, width=650, title="2D drawing")
+
     # Google Maps for project location
     st.markdown("### Project Location (3D Map)")
-    st.components.v1.html(
-        f"<iframe width='100%' height='400' frameborder='0' style='border:0;' src='https://maps.google.com/maps?q={lat},{lon}&z=18&output=embed'></iframe>",
-        height=420
-    )
+    viewer(map_url, height=400, title="Google Maps")
 
 # ─────────────────────────────────────────────────────────┐
 # Progress Monitoring Page                                |
 # ─────────────────────────────────────────────────────────┘
-elif page == "Progress Monitoring":
-    # Home button
-    if st.button("🏠 Home"):
-        st.session_state.page = "Home"
-    st.markdown('<div style="padding:1.5rem;background:white; border-radius:8px; box-shadow:0 2px 6px rgba(0,0,0,0.1);">', unsafe_allow_html=True)
+def render_progress(snapshot_keys):
+    st.markdown(CARD_OPEN, unsafe_allow_html=True)
     st.subheader("Progress Monitoring")
-    date_key = st.selectbox("Choose date", list(prog_excels.keys()))
+    date_key = st.selectbox("Choose date", snapshot_keys)
+    snapshot = snapshot_catalog.get(date_key)
+    if snapshot is None:
+        # The file went away since the list was built; the next rerun drops it
+        st.warning(f"Snapshot {date_key} is no longer available.")
+        st.markdown(CARD_CLOSE, unsafe_allow_html=True)
+        return
     col_gif, col_photo = st.columns(2)
-    col_gif.image(prog_gifs[date_key], caption=f"GIF: {date_key}", use_container_width=True)
-    photo = site_images.get(date_key)
-    if photo:
-        col_photo.image(photo, caption=f"Photo: {date_key}", use_container_width=True)
+    if snapshot.gif:
+        media.show(col_gif, snapshot.gif, f"GIF: {date_key}", key="prog-gif-orig", width=COLUMN_WIDTH)
+    if snapshot.photo:
+        media.show(col_photo, snapshot.photo, f"Photo: {date_key}", key="prog-photo-orig", width=COLUMN_WIDTH)
     st.markdown("**3D Models**")
     c1, c2 = st.columns(2)
     with c1:
         st.markdown("**As-Planned**")
-        st.components.v1.iframe(as_planned_url, height=650, scrolling=True)
+        viewer(as_planned_url, height=650, title="As-Planned model")
     with c2:
         st.markdown(f"**As-Built ({date_key})**")
-        st.components.v1.iframe(as_built_urls[date_key], height=650, scrolling=True)
+        # Dates opened earlier stay mounted (hidden) so switching back is instant
+        viewer_group(as_built_urls, date_key, key=f"as-built-{site.key}", height=650, title="As-Built model")
+        if date_key not in as_built_urls:
+            st.info("No as-built model linked for this date yet.")
     st.markdown("**Progress Data**")
     try:
-        df_prog = pd.read_excel(prog_excels[date_key], engine="openpyxl")
-        st.dataframe(df_prog, use_container_width=True)
+        df_prog = snapshot_catalog.frame(date_key)
+        paged_table(df_prog, key="prog-table")
     except Exception:
         st.error("Could not load progress data.")
-    st.markdown('</div>', unsafe_allow_html=True)
+
+    # Compare any two snapshots
+    if len(snapshot_keys) > 1:
+        st.markdown("---")
+        st.markdown("**Compare Snapshots**")
+        ca, cb = st.columns(2)
+        key_a = ca.selectbox("From", snapshot_keys, index=0, key="prog-compare-a")
+        key_b = cb.selectbox("To", snapshot_keys, index=len(snapshot_keys) - 1, key="prog-compare-b")
+        try:
+            delta = snapshot_catalog.diff(key_a, key_b) if key_a != key_b else None
+        except (KeyError, OSError):
+            st.warning("One of the snapshots is no longer available.")
+            delta = None
+        if delta is not None:
+            cols = st.columns(len(delta.summary))
+            for col, (label, value) in zip(cols, delta.summary.items()):
+                col.metric(label[0].upper() + label[1:], f"{value:,.0f}" if float(value).is_integer() else f"{value:,.2f}")
+            st.caption(f"Matched on column: {delta.id_column}")
+            tab_changed, tab_added, tab_removed = st.tabs(["Changed", "Added", "Removed"])
+            with tab_changed:
+                paged_table(delta.changed, key="prog-diff-changed")
+            with tab_added:
+                paged_table(delta.added, key="prog-diff-added")
+            with tab_removed:
+                paged_table(delta.removed, key="prog-diff-removed")
+    st.markdown(CARD_CLOSE, unsafe_allow_html=True)
 
 # ─────────────────────────────────────────────────────────┐
 # Earned Value Analysis Page                              |
 # ─────────────────────────────────────────────────────────┘
-elif page == "Earned Value Analysis":
-    if st.button("🏠 Home"):
-        st.session_state.page = "Home"
-    st.markdown('<div style="padding:1.5rem;background:white; border-radius:8px; box-shadow:0 2px 6px rgba(0,0,0,0.1);">', unsafe_allow_html=True)
+def render_eva():
+    st.markdown(CARD_OPEN, unsafe_allow_html=True)
     st.subheader("Earned Value Analysis")
-    # File uploader or default
-    upload = st.file_uploader("Upload EVA Excel (or skip)", type=["xlsx"])
+    # File uploader or default (keyed by a generation, so a refused upload can be cleared)
+    upload_gen = st.session_state.get("eva-upload-gen", 0)
+    upload = st.file_uploader("Upload EVA Excel (or skip)", type=["xlsx"], key=f"eva-upload-{upload_gen}")
+    if st.session_state.pop("eva-upload-refused", False):
+        st.error(f"Upload is larger than this session's memory budget "
+                 f"({session_memory.budget / 2**20:,.0f} MB).")
     if upload:
-        eva_df = pd.read_excel(upload, engine="openpyxl")
+        # Streamlit keeps uploads in this session's memory; refuse one that breaks the budget
+        run_ctx = get_script_run_ctx()
+        if not session_memory.fits_upload(run_ctx and run_ctx.session_id, upload.size):
+            # A new key replaces the widget with an empty one, which lets go of the file
+            st.session_state["eva-upload-gen"] = upload_gen + 1
+            st.session_state["eva-upload-refused"] = True
+            metrics.incr("uploads_refused")
+            st.rerun()
+        source = upload
     else:
-        default_path = Path("data/EVA_Analysis.xlsx")
-        if not default_path.exists():
+        source = data_dir / EVA_FILE
+        if not source.exists():
             st.error("No default EVA file found. Please upload.")
             st.stop()
-        eva_df = pd.read_excel(default_path, engine="openpyxl")
-    # Prepare data
-    eva_df["Planned Date"] = pd.to_datetime(eva_df["Planned Date"], errors="coerce")
-    eva_df["Actual Date"]  = pd.to_datetime(eva_df["Actual Date"], errors="coerce")
-    eva_df = eva_df.set_index("Planned Date").sort_index()
+    version = source_key(source)  # hashes an upload once per rerun
+    raw_df = read_excel_cached(source, version=version)
+
+    # Compute EVA from the raw cost/progress columns (cached per file + status date)
+    status_date = st.date_input("Status date", value=datetime.date.today(), key="eva-status")
+    try:
+        eva_df = frame_cache.get_or_load(
+            version + ("eva", str(status_date)),
+            lambda: compute_eva(raw_df, status_date),
+        )
+    except (KeyError, ValueError) as exc:
+        st.error(exc.args[0])
+        st.stop()
+    eva_df = eva_df.set_index("Planned Date")
+    summary = summarize(eva_df)
     st.markdown("**EVA Input Table**")
-    st.dataframe(eva_df, use_container_width=True)
+    paged_table(eva_df, key="eva-table")
 
     # Metrics
-    total_planned = eva_df["Planned Cost"].sum()
-    total_actual  = eva_df["Actual Cost"].sum()
-    pct_complete  = eva_df["Actual Percentage"].max() * 100
     m1, m2, m3 = st.columns(3)
-    m1.metric("Total Planned Cost", f"₹{total_planned:,.0f}")
-    m2.metric("Total Actual Cost",  f"₹{total_actual:,.0f}")
-    m3.metric("Project % Complete", f"{pct_complete:.1f}%")
+    m1.metric("Total Planned Cost", f"₹{summary['BAC']:,.0f}")
+    m2.metric("Total Actual Cost",  f"₹{summary['ACWP']:,.0f}")
+    m3.metric("Project % Complete", f"{summary['Percent Complete'] * 100:.1f}%")
+    m4, m5, m6, m7, m8 = st.columns(5)
+    m4.metric("SPI", f"{summary['SPI']:.2f}")
+    m5.metric("CPI", f"{summary['CPI']:.2f}")
+    m6.metric("EAC", f"₹{summary['EAC']:,.0f}")
+    m7.metric("VAC", f"₹{summary['VAC']:,.0f}")
+    m8.metric("TCPI", f"{summary['TCPI']:.2f}")
 
     st.markdown("---")
-    # S-Curve chart
-    scurve = eva_df[["Cummulative Planned Cost","Cummulative Actual Cost"]]
-    scurve = scurve.rename(columns={"Cummulative Planned Cost":"Planned (Cum.)","Cummulative Actual Cost":"Actual (Cum.)"})
-    st.markdown("**S-Curve: Cumulative Planned vs Actual Cost**")
+    # S-Curve chart: derived once per file and shared by every session
+    # (memory-mapped from the precomputed copy when precompute.py has run)
+    computed = {}  # derive() runs at most once per rerun, whichever series miss
+
+    def compute(name):
+        if name not in computed:
+            computed.update(derive(raw_df))
+        return computed[name]
+
+    derived = {name: read_derived_cached(source, name, lambda name=name: compute(name), version=version)
+               for name in ("scurve", "delays")}
+    scurve = derived["scurve"].set_index("Planned Date")
+    scurve = scurve.rename(columns={"Cum Planned":"Planned (Cum.)","Cum BCWP":"Earned (Cum.)","Cum ACWP":"Actual (Cum.)"})
+    scurve, n_points = downsample_lines(scurve)
+    st.markdown("**S-Curve: Cumulative Planned vs Earned vs Actual Cost**")
     st.line_chart(scurve)
+    st.caption(reduction_caption(len(scurve), n_points))
 
 
     st.markdown("---")
     # Delays bar chart
-    delays = eva_df.copy()
-    delays["Delay Days"] = (delays["Actual Date"] - delays.index).dt.days
-    delays = delays.set_index("Activities")
+    delay_df = derived["delays"]
+    delays = pd.Series(delay_df["Delay Days"].to_numpy(), index=delay_df["Activities"], name="Delay Days")
     st.markdown("**Activity Delays (Actual – Planned) in Days**")
-    st.bar_chart(delays["Delay Days"])
+    delay_views = ["Per activity", "Top 50 worst"] + [f"{b} mean" for b in BUCKETS]
+    delay_view = st.selectbox("Delays view", delay_views,
+                              index=0 if len(delays) <= MAX_BARS else 1, key="eva-delay-view")
+    if delay_view == "Top 50 worst":
+        delays, n_bars = top_n(delays.dropna(), 50)
+    elif delay_view != "Per activity":
+        by_date = pd.Series(delays.to_numpy(), index=pd.DatetimeIndex(delay_df["Planned Date"]), name="Delay Days").dropna()
+        delays, n_bars = aggregate_bars(by_date, delay_view.split()[0], how="mean")
+    else:
+        n_bars = len(delays)
+    st.bar_chart(delays)
+    st.caption(reduction_caption(len(delays), n_bars, "bars"))
 
     st.markdown("---")
     # SPI & CPI table
-    spi_cpi = eva_df[["SPI = BCWP / BCWS","CPI = BCWP / ACWP"]]
-    spi_cpi = spi_cpi.rename(columns={"SPI = BCWP / BCWS":"SPI","CPI = BCWP / ACWP":"CPI"})
+    spi_cpi = eva_df[["SPI","CPI"]]
     st.markdown("**Activity Performance Indices (SPI & CPI)**")
-    def highlight(v): return 'background-color:#c6efce' if v>=1 else 'background-color:#ffc7ce'
-    st.dataframe(spi_cpi.style.applymap(highlight), use_container_width=True)
+    paged_table(eva_df[["Activities","SPI","CPI"]], key="eva-spi-cpi", highlight=["SPI","CPI"])
 
     st.markdown("---")
     # Variance bar chart
-    var = eva_df[["SV = BCWP - BCWS","CV = BCWP - ACWP"]]
-    var = var.rename(columns={"SV = BCWP - BCWS":"SV","CV = BCWP - ACWP":"CV"})
+    var = eva_df[["SV","CV"]]
     st.markdown("**Schedule & Cost Variance**")
+    var_views = ["Per activity"] + list(BUCKETS)
+    var_view = st.selectbox("Variance view", var_views,
+                            index=0 if len(var) <= MAX_BARS else 2, key="eva-var-view")
+    if var_view != "Per activity":
+        var, n_bars = aggregate_bars(var[var.index.notna()], var_view)
+    else:
+        n_bars = len(var)
     st.bar_chart(var)
+    st.caption(reduction_caption(len(var), n_bars, "bars"))
+
+    st.markdown("---")
+    # Rollups per reporting period and per WBS level
+    st.markdown("**EVA Rollups**")
+    periods = {"Weekly": "W", "Monthly": "M", "Quarterly": "Q"}
+    period = st.selectbox("Reporting period", list(periods), index=1, key="eva-period")
+    st.dataframe(rollup_period(eva_df.reset_index(), periods[period], status_date), use_container_width=True)
+    if "WBS" in eva_df.columns:
+        depth = max(str(code).count(".") for code in eva_df["WBS"].unique()) + 1
+        level = st.slider("WBS level", 1, max(depth, 1), 1, key="eva-wbs-level") if depth > 1 else 1
+        st.dataframe(rollup_wbs(eva_df, level), use_container_width=True)
 
     st.markdown("---")
     # SPI vs CPI scatter
     st.markdown("**SPI vs CPI Scatter**")
-    st.scatter_chart(spi_cpi)
-    st.markdown('</div>', unsafe_allow_html=True)
+    scatter, n_points = bin_scatter(spi_cpi, "SPI", "CPI")
+    if "Count" in scatter.columns:
+        st.scatter_chart(scatter, x="SPI", y="CPI", size="Count")
+        st.caption(f"{n_points:,} activities binned into {len(scatter):,} density cells")
+    else:
+        st.scatter_chart(scatter, x="SPI", y="CPI")
+        st.caption(reduction_caption(len(scatter), n_points))
+    st.markdown(CARD_CLOSE, unsafe_allow_html=True)
 
 # ─────────────────────────────────────────────────────────┐
 # Milestone Tracker Page                                   |
 # ─────────────────────────────────────────────────────────┘
-# ─────────────────────────────────────────────────────────┐
-# Milestone Tracker Page                                   |
-# ─────────────────────────────────────────────────────────┘
-elif page == "Milestone Tracker":
-    if st.button("🏠 Home"):
-        st.session_state.page = "Home"
-
+def render_milestones(ms_df, ms_version):
     st.subheader("Milestone Tracker")
 
-    # 1. Load your Excel
-    milestone_path = Path("data/Milestone.xlsx")
-    if not milestone_path.exists():
-        st.error(f"Milestone file not found at {milestone_path}")
-        st.stop()
-    ms_df = pd.read_excel(milestone_path, 
-                          parse_dates=["Planned Date", "Actual Date"],
-                          engine="openpyxl")
-
-    # 2. Show the raw table
+    # 1. Show the raw table
     st.markdown("**Milestone Table**")
-    st.dataframe(ms_df, use_container_width=True)
+    paged_table(ms_df, key="ms-table")
 
-    # 3. Prepare for the Gantt chart
-    #    Fill missing Actual Date with today (so incomplete tasks span to now)
+    # 2. Index the bars once per file version; incomplete tasks span to today
     today = pd.Timestamp.today().normalize()
-    ms_df["End"] = ms_df["Actual Date"].fillna(today)
-
-    # 4. Build the Altair Gantt-style chart
-    gantt = (
-        alt.Chart(ms_df)
-           .mark_bar(cornerRadiusTopLeft=3, cornerRadiusBottomLeft=3)
-           .encode(
-               y=alt.Y("Activities:N", sort=ms_df["Activities"].tolist(),
-                       title=None, axis=alt.Axis(labelFontSize=12)),
-               x=alt.X("Planned Date:T", title="Date"),
-               x2="End:T",
-               color=alt.condition(
-                   "datum['Actual Date'] != null",
-                   alt.value("#264653"),   # completed (dark teal)
-                   alt.value("#E76F51")    # pending (reddy orange)
-               ),
-               tooltip=[
-                   "Activities",
-                   alt.Tooltip("Planned Date", title="Planned"),
-                   alt.Tooltip("Actual Date",  title="Actual")
-               ]
-           )
-           .properties(height=350)
-           .configure_axis(grid=False)
-    )
+    timeline = get_timeline(ms_version, ms_df, today)
+    if not len(timeline):
+        st.info("No milestones with a planned date to chart.")
+        return
 
+    # 3. Choose the visible window: dates, rows and grouping
     st.markdown("**Milestone Timeline**")
-    st.altair_chart(gantt, use_container_width=True)
+    lo, hi = timeline.min_date.date(), timeline.max_date.date()
+    c_win, c_group, c_rows = st.columns([3, 1, 1])
+    if lo < hi:
+        win_start, win_end = c_win.slider("Date window", lo, hi, (lo, hi), key="ms-window")
+    else:
+        win_start, win_end = lo, hi
+    levels = {"Auto": None, "Individual bars": 0}
+    levels.update({f"WBS level {i}": i for i in range(1, timeline.group_levels + 1)})
+    if not timeline.group_levels:
+        levels["By planned month"] = 1
+    grouping = c_group.selectbox("Grouping", list(levels), key="ms-grouping")
+    row_limit = c_rows.selectbox("Rows", [30, 60, 120], index=1, key="ms-rows")
+    _, n_rows = timeline.window(win_start, win_end, 0, row_limit, levels[grouping])
+    row_offset = 0
+    if n_rows > row_limit:
+        row_offset = st.number_input(f"First row (of {n_rows:,})", 1, n_rows, 1, step=row_limit, key="ms-offset") - 1
+
+    # 4. Build (or reuse) the Gantt spec for just that window
+    spec, shown, total = timeline.spec(ms_version, win_start, win_end, row_offset, row_limit, levels[grouping])
+    st.vega_lite_chart(spec, use_container_width=True)
+    st.caption(f"Showing {shown:,} of {total:,} bars in window ({len(timeline):,} milestones in schedule)")
     st.markdown("---")
 
-
 # ─────────────────────────────────────────────────────────┐
 # Financial Overview Page                                  |
 # ─────────────────────────────────────────────────────────┘
-elif page == "Financial Overview":
-    if st.button("🏠 Home"):
-        st.session_state.page = "Home"
-    st.markdown('<div style="padding:1.5rem;background:white; border-radius:8px; box-shadow:0 2px 6px rgba(0,0,0,0.1);">', unsafe_allow_html=True)
+def render_financials(fin_df):
+    st.markdown(CARD_OPEN, unsafe_allow_html=True)
     st.subheader("Financial Overview")
     st.bar_chart(fin_df)
-    st.markdown('</div>', unsafe_allow_html=True)
+    st.markdown(CARD_CLOSE, unsafe_allow_html=True)
 
 # ─────────────────────────────────────────────────────────┐
 # Precast Element Status Page                              |
 # ─────────────────────────────────────────────────────────┘
-elif page == "Precast Element Status":
-    if st.button("🏠 Home"):
-        st.session_state.page = "Home"
-    st.markdown('<div style="padding:1.5rem;background:white; border-radius:8px; box-shadow:0 2px 6px rgba(0,0,0,0.1);">', unsafe_allow_html=True)
+def render_elements(store):
+    st.markdown(CARD_OPEN, unsafe_allow_html=True)
     st.subheader("Precast Element Status")
-    filter_type = st.selectbox("Filter by type", ["All"] + elem_df["Type"].unique().tolist())
-    df_filtered = elem_df if filter_type=="All" else elem_df[elem_df["Type"]==filter_type]
-    st.dataframe(df_filtered, use_container_width=True)
-    st.markdown('</div>', unsafe_allow_html=True)
+    c_type, c_status, c_since = st.columns([2, 2, 1])
+    types = c_type.multiselect("Type", store.types(), key="elem-types")
+    statuses = c_status.multiselect("Status", store.statuses(), key="elem-statuses")
+    since = c_since.date_input("Changed since", value=None, key="elem-since")
+
+    # Status rollup over the selected types
+    counts = store.status_counts(types)
+    if len(counts):
+        cols = st.columns(min(len(counts), 6))
+        for i, (status, n) in enumerate(counts.items()):
+            cols[i % len(cols)].metric(status, f"{n:,}")
+
+    df_filtered = store.query(types, statuses, since)
+    paged_table(df_filtered, key="elem-table")
+    st.markdown(CARD_CLOSE, unsafe_allow_html=True)
 
 # ─────────────────────────────────────────────────────────┐
 # As Planned Model Viewer Page                              |
 # ─────────────────────────────────────────────────────────┘
-elif page == "As Planned":
-    if st.button("🏠 Home"):
-        st.session_state.page = "Home"
-    st.markdown('<div style="padding:1.5rem;background:white; border-radius:8px; box-shadow:0 2px 6px rgba(0,0,0,0.1);">', unsafe_allow_html=True)
+def render_as_planned():
+    st.markdown(CARD_OPEN, unsafe_allow_html=True)
     st.subheader("3D Model Viewer (As-Planned)")
-    st.components.v1.iframe(as_planned_url, height=650, scrolling=True)
-    st.markdown('</div>', unsafe_allow_html=True)
+    viewer(as_planned_url, height=650, title="As-Planned model")
+    st.markdown(CARD_CLOSE, unsafe_allow_html=True)
 
 # ─────────────────────────────────────────────────────────┐
 # Site Map Page                                           |
 # ─────────────────────────────────────────────────────────┘
-elif page == "Site Map":
-    if st.button("🏠 Home"):
-        st.session_state.page = "Home"
-    st.markdown('<div style="padding:1.5rem;background:white; border-radius:8px; box-shadow:0 2px 6px rgba(0,0,0,0.1);">', unsafe_allow_html=True)
+def render_site_map():
+    st.markdown(CARD_OPEN, unsafe_allow_html=True)
     st.subheader("Project Location (3D Map)")
-    map_html = f"<iframe width='100%' height='700' frameborder='0' style='border:0;' src='https://maps.google.com/maps?q={lat},{lon}&z=18&output=embed'></iframe>"
-    st.components.v1.html(map_html, height=720)
-    st.markdown('</div>', unsafe_allow_html=True)
+    viewer(map_url, height=700, title="Google Maps")
+    st.markdown(CARD_CLOSE, unsafe_allow_html=True)
+
+# ─────────────────────────────────────────────────────────┐
+# Portfolio Page                                          |
+#    - Every site's EVA and milestones, parsed in parallel  |
+#    - Drill-down switches the active site                  |
+# ─────────────────────────────────────────────────────────┘
+def open_site():
+    # Button callback: runs before the next rerun builds the site selector
+    st.session_state.site = st.session_state["pf-site"]
+    st.session_state.page = st.session_state["pf-page"]
+
+def render_portfolio():
+    st.markdown(CARD_OPEN, unsafe_allow_html=True)
+    st.subheader("Portfolio")
+    all_sites = site_manifest.sites
+    status_date = st.date_input("Status date", value=datetime.date.today(), key="pf-status")
+    progress = st.empty()
+    pf, load = portfolio(list(all_sites.values()), status_date,
+                         on_progress=lambda done, total: progress.progress(done / total, f"Parsing workbooks {done:,}/{total:,}"))
+    progress.empty()
+    totals = portfolio_totals(pf)
+
+    m1, m2, m3, m4, m5, m6 = st.columns(6)
+    m1.metric("Sites", f"{len(pf):,}")
+    m2.metric("Portfolio SPI", f"{totals['SPI']:.2f}")
+    m3.metric("Portfolio CPI", f"{totals['CPI']:.2f}")
+    m4.metric("Total Planned Cost", f"₹{totals['BAC']:,.0f}")
+    m5.metric("Total Actual Cost", f"₹{totals['ACWP']:,.0f}")
+    m6.metric("Total EAC", f"₹{totals['EAC']:,.0f}")
+    m7, m8, m9, _, _, _ = st.columns(6)
+    m7.metric("Overdue Milestones", f"{totals['Overdue']:,}")
+    m8.metric("Completed Milestones", f"{totals['Completed']:,} / {totals['Milestones']:,}")
+    m9.metric("Sites with Errors", f"{totals['Sites with errors']:,}")
+    st.caption(f"{load['computed']:,} site(s) recomputed, {load['cached']:,} unchanged (cached)")
+
+    table = pf.assign(Site=[all_sites[key].name for key in pf.index]).rename_axis("Key")
+    table = table[["Site", "SPI", "CPI", "BAC", "BCWP", "ACWP", "EAC", "VAC",
+                   "Percent Complete", "Milestones", "Completed", "Overdue", "Error"]]
+    paged_table(table, key="pf-table", highlight=["SPI", "CPI"])
+
+    st.markdown("**Overdue Milestones by Site**")
+    overdue = pd.Series(pf["Overdue"].fillna(0).to_numpy(), index=table["Site"], name="Overdue")
+    overdue, n_sites = top_n(overdue[overdue > 0])
+    st.bar_chart(overdue)
+    st.caption(reduction_caption(len(overdue), n_sites, unit="sites with overdue milestones"))
+
+    st.markdown("**Open a Site**")
+    c_site, c_page, c_go = st.columns([2, 2, 1])
+    c_site.selectbox("Site", list(all_sites), key="pf-site", format_func=lambda key: all_sites[key].name)
+    c_page.selectbox("Page", [key for key in pages if key not in ("Home", "Portfolio")], key="pf-page")
+    c_go.button("Open ▶", key="pf-open", on_click=open_site)
+    st.markdown(CARD_CLOSE, unsafe_allow_html=True)
+
+# ─────────────────────────────────────────────────────────┐
+# 4. Page Registry                                         |
+#    - page key -> (nav label, icon, loader, renderer)      |
+#    - loader may be None; its dict is passed to renderer   |
+#    - every page except Home gets a nav button             |
+#    - page_sources: files/topics each page reads, for the  |
+#      change feed's targeted reruns                        |
+# ─────────────────────────────────────────────────────────┘
+pages = {
+    "Home":                   ("Home",                        "🏠", None,             render_home),
+    "Portfolio":              ("Portfolio",                   "🌐", None,             render_portfolio),
+    "Progress Monitoring":    ("Progress Monitoring",         "🏗️", load_progress,    render_progress),
+    "Earned Value Analysis":  ("Earned Value Analysis",       "📊", None,             render_eva),
+    "Milestone Tracker":      ("Milestone Tracker",           "🎯", load_milestones,  render_milestones),
+    "Financial Overview":     ("Financial Overview(TBD)",     "💰", load_financials,  render_financials),
+    "Precast Element Status": ("Precast Element Status(TBD)", "📦", load_elements,    render_elements),
+    "As Planned":             ("As Planned",                  "🧱", None,             render_as_planned),
+    "Site Map":               ("Site Map",                    "🗺️", None,             render_site_map),
+}
+sections = [(key, label, icon) for key, (label, icon, _, _) in pages.items() if key != "Home"]
+
+# What each page reads: watcher globs (relative to the app directory) or topics,
+# filled in per site. A change reruns only the sessions currently on a page
+# (of that site) listed against it; Portfolio follows every site's workbooks.
+page_sources = {
+    "Home":                   ("weather:{key}", "{visuals}/Siteimage.png", "visuals/thumbnails/*"),
+    "Progress Monitoring":    ("{data}/progress_*", "{visuals}/*"),
+    "Earned Value Analysis":  ("{data}/" + EVA_FILE,),
+    "Milestone Tracker":      ("{data}/" + MILESTONE_FILE,),
+    "Precast Element Status": ("{elements_db}*",),
+    "As Planned":             ("visuals/thumbnails/*",),
+    "Site Map":               ("visuals/thumbnails/*",),
+}
+
+@st.cache_resource(show_spinner=False)
+def watch_sites(manifest_version):
+    # Once per manifest version: folders to poll, per-site page sources, catalog rescans
+    all_sites = site_manifest.sites.values()
+    for s in all_sites:
+        change_feed.watch(s.data_dir, s.visuals_dir)
+        fields = {"key": s.key, "data": s.data_dir, "visuals": s.visuals_dir, "elements_db": s.elements_db}
+        for key, sources in page_sources.items():
+            change_feed.depends(f"{s.key}/{key}", *(src.format(**fields) for src in sources))
+        catalog = get_catalog(s.data_dir, s.visuals_dir)
+        for pattern in (f"{s.data_dir}/progress_*", f"{s.visuals_dir}/*"):
+            change_feed.on_change(pattern, catalog.invalidate)  # once per catalog, even for shared folders
+    change_feed.depends("Portfolio", *(f"{s.data_dir}/{name}" for s in all_sites
+                                       for name in (EVA_FILE, MILESTONE_FILE)))
+
+watch_sites(site_manifest.version)
+
+# ─────────────────────────────────────────────────────────┐
+# 5. Navigation Buttons                                    |
+#    - On click, set session_state.page                     |
+# ─────────────────────────────────────────────────────────┘
+nav_cols = st.columns(len(sections), gap="small")
+for (key, label, icon), col in zip(sections, nav_cols):
+    with col:
+        if st.button(f"{icon}  {label}", key=label):
+            st.session_state.page = key
+st.markdown("---")
+
+# Determine current page (default: Home)
+page = st.session_state.get("page", "Home")
+
+# Lite mode: every 3D model / map embed waits for a click (see embeds.py)
+lite_mode_toggle()
 
 # ─────────────────────────────────────────────────────────┐
-# Fallback for unknown page                                |
+# 6. Debug Panel (sidebar, only when debug is on)           |
+#    - This rerun's timings and counters                    |
+#    - Per-page aggregates, cache stats, exports            |
+#    - One-shot cProfile capture of the next interaction    |
 # ─────────────────────────────────────────────────────────┘
-else:
+def render_debug_panel(record, usage):
+    with st.sidebar.expander("⚙️ Performance", expanded=True):
+        if record:
+            st.markdown(f"**This rerun ({record['page']})**")
+            st.dataframe(pd.DataFrame(
+                [(k, f"{v * 1000:.1f} ms") for k, v in record["timings"].items()] +
+                [(k, f"{v:,.0f}") for k, v in record["counters"].items()],
+                columns=["Metric", "Value"]), hide_index=True, use_container_width=True)
+        timings, counters = metrics.snapshot()
+        st.markdown("**Per page (process lifetime)**")
+        st.dataframe(pd.DataFrame(
+            [(page_, name, n, total / n * 1000, worst * 1000) for (name, page_), (n, total, worst) in timings.items()],
+            columns=["Page", "Section", "Count", "Mean ms", "Max ms"]).sort_values(["Page", "Section"]),
+            hide_index=True, use_container_width=True)
+        st.dataframe(pd.DataFrame(
+            [(page_, name, value) for (name, page_), value in counters.items()],
+            columns=["Page", "Counter", "Total"]).sort_values(["Page", "Counter"]),
+            hide_index=True, use_container_width=True)
+        st.caption("Frame cache: " + ", ".join(f"{k} {v:,}" for k, v in frame_cache.stats().items()))
+        st.caption("Change feed: " + ", ".join(f"{k} {v:,}" for k, v in change_feed.stats().items()))
+        st.markdown(f"**Session memory** (this session {usage.total / 2**20:,.2f} MB "
+                    f"of {session_memory.budget / 2**20:,.0f} MB)")
+        if usage.media is None:
+            st.caption(f"Media is not measured on Streamlit {st.__version__}.")
+        mem_sessions, mem_pages = session_memory.report()
+        st.dataframe(mem_pages, use_container_width=True)
+        st.dataframe(mem_sessions, hide_index=True, use_container_width=True)
+        c_prom, c_json = st.columns(2)
+        c_prom.download_button("Prometheus", metrics.prometheus_text(), "metrics.prom", "text/plain")
+        c_json.download_button("JSON lines", metrics.jsonl(), "reruns.jsonl", "application/x-ndjson")
+        if st.button("Profile next interaction", key="debug-profile"):
+            st.session_state.profile_next = True
+        if record and record.get("profile"):
+            st.session_state.last_profile = record["profile"]
+        if st.session_state.get("last_profile"):
+            st.code(st.session_state.last_profile, language=None)
+
+# ─────────────────────────────────────────────────────────┐
+# 7. Dispatch: run only the active page's loader & body     |
+#    - Timed per rerun and per page through metrics         |
+# ─────────────────────────────────────────────────────────┘
+if page not in pages:
+    # Fallback for unknown page
     st.error(f"Unknown page: {page}")
+    st.stop()
+
+if page != "Home" and st.button("🏠 Home"):
+    st.session_state.page = "Home"
+    st.rerun()
+
+_, _, loader, renderer = pages[page]
+ctx = get_script_run_ctx()
+page_key = page if page == "Portfolio" else f"{site.key}/{page}"
+if ctx:
+    change_feed.register(ctx.session_id, page_key)
+
+@st.fragment(run_every=WATCH_INTERVAL)
+def follow_changes(page_key):
+    # Fallback for push reruns: rerun the app when the change feed moves this page's revision
+    revision = (page_key, change_feed.revision(page_key))
+    seen = st.session_state.get("feed-revision")
+    st.session_state["feed-revision"] = revision
+    if seen is not None and seen[0] == page_key and seen != revision:
+        st.rerun()
+
+if ctx and not can_push():
+    follow_changes(page_key)
+profile = debug and st.session_state.pop("profile_next", False)
+rerun_record = {}
+try:
+    with metrics.rerun(page, ctx.session_id if ctx else None, profile=profile) as rerun_record:
+        with metrics.timer("loader"):
+            page_data = loader() if loader else {}
+        with metrics.timer("render"):
+            renderer(**page_data)
+finally:
+    usage = session_memory.account(ctx and ctx.session_id, page_key, st.session_state)
+    if usage.total > session_memory.budget:
+        st.sidebar.warning(f"This session holds {usage.total / 2**20:,.1f} MB, over its "
+                           f"{session_memory.budget / 2**20:,.0f} MB budget.")
+    if debug:
+        render_debug_panel(rerun_record, usage)
@@ -0,0 +1,201 @@
+"""
+Persistent precast element inventory.
+
+Elements live in a SQLite table keyed by Element ID, with secondary indexes
+on Type, Status and Last Updated (plus Type+Status for the common combined
+filter). Yard updates arrive as upserts, where a row only replaces an older
+one. The page asks for just the slice it shows, so a rerun never reloads the
+full inventory:
+
+  query(types, statuses, since)   multi-field filter, newest first
+  status_counts(types)            rows per status (index-only GROUP BY)
+  changed_since(ts)               rows updated after ts
+  types() / statuses()            distinct values for the filter widgets
+
+Every upsert bumps a revision number. Results are cached in the shared frame
+cache keyed by (revision, filters), with Type and Status as categoricals, so
+an unchanged store costs one tiny SELECT per rerun. The database runs in WAL
+mode, so a writer (e.g. `python element_store.py import updates.csv`) never
+blocks readers. Each thread keeps its own connection.
+
+Environment:
+  DASHBOARD_ELEMENTS_DB   database path (default data/elements.sqlite)
+"""
+import os
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+import metrics
+from frame_cache import frame_cache
+
+DEFAULT_PATH = os.environ.get("DASHBOARD_ELEMENTS_DB", "data/elements.sqlite")
+COLUMNS = ["Element ID", "Type", "Status", "Last Updated"]
+CATEGORICAL = ["Type", "Status"]
+
+# The original hardcoded inventory; written into the built-in demo site's empty store
+SEED_ROWS = [
+    ("PC-101", "Wall",   "Manufactured",      "2025-04-20"),
+    ("PC-102", "Beam",   "QA Passed",         "2025-04-22"),
+    ("PC-103", "Slab",   "Installed on Site", "2025-04-23"),
+    ("PC-104", "Column", "QA Pending",        "2025-04-24"),
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS elements (
+    element_id   TEXT PRIMARY KEY,
+    type         TEXT NOT NULL,
+    status       TEXT NOT NULL,
+    last_updated TEXT NOT NULL          -- ISO 8601, so text order is time order
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS elements_type ON elements (type);
+CREATE INDEX IF NOT EXISTS elements_status ON elements (status);
+CREATE INDEX IF NOT EXISTS elements_updated ON elements (last_updated);
+CREATE INDEX IF NOT EXISTS elements_type_status ON elements (type, status);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta VALUES ('revision', 0);
+"""
+
+_UPSERT = """
+INSERT INTO elements (element_id, type, status, last_updated) VALUES (?, ?, ?, ?)
+ON CONFLICT (element_id) DO UPDATE SET
+    type = excluded.type, status = excluded.status, last_updated = excluded.last_updated
+WHERE excluded.last_updated >= elements.last_updated
+"""
+
+
+def _iso(value):
+    return pd.Timestamp(value).isoformat()
+
+
+class ElementStore:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = Path(path)
+        self._local = threading.local()
+        self._distinct_cache = {}     # (column, revision) -> sorted distinct values
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def revision(self):
+        return self._conn().execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()[0]
+
+    def upsert(self, rows):
+        """
+        Insert or update (Element ID, Type, Status, Last Updated) rows, given as
+        tuples or a DataFrame with those columns. Stale updates (older than
+        the stored Last Updated) are ignored. Returns the number of rows written.
+        """
+        if isinstance(rows, pd.DataFrame):
+            rows = rows[COLUMNS].itertuples(index=False, name=None)
+        params = [(str(eid), str(typ), str(status), _iso(updated)) for eid, typ, status, updated in rows]
+        conn = self._conn()
+        with metrics.timer("element_upsert"), conn:
+            before = conn.total_changes
+            conn.executemany(_UPSERT, params)
+            written = conn.total_changes - before
+            if written:
+                conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'revision'")
+        return written
+
+    def seed(self, rows=SEED_ROWS):
+        """Fill an empty store with rows; no-op once it has any elements."""
+        if self._conn().execute("SELECT 1 FROM elements LIMIT 1").fetchone() is None:
+            self.upsert(rows)
+
+    def _where(self, types=None, statuses=None, since=None):
+        clauses, params = [], []
+        for column, values in (("type", types), ("status", statuses)):
+            if values:
+                clauses.append(f"{column} IN ({','.join('?' * len(values))})")
+                params += list(values)
+        if since is not None:
+            clauses.append("last_updated > ?")
+            params.append(_iso(since))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _distinct(self, column):
+        key = (column, self.revision())
+        values = self._distinct_cache.get(key)
+        if values is None:
+            rows = self._conn().execute(f"SELECT DISTINCT {column} FROM elements ORDER BY {column}").fetchall()
+            values = [r[0] for r in rows]
+            self._distinct_cache = {k: v for k, v in self._distinct_cache.items() if k[1] == key[1]}
+            self._distinct_cache[key] = values
+        return values
+
+    def types(self):
+        return self._distinct("type")
+
+    def statuses(self):
+        return self._distinct("status")
+
+    def _frame(self, rows):
+        df = pd.DataFrame(rows, columns=COLUMNS)
+        for col in CATEGORICAL:
+            df[col] = pd.Categorical(df[col], categories=self._distinct(col.lower()))
+        df["Last Updated"] = pd.to_datetime(df["Last Updated"], format="ISO8601")
+        return df
+
+    def _fetch(self, types, statuses, since):
+        where, params = self._where(types, statuses, since)
+        with metrics.timer("element_query"):
+            rows = self._conn().execute(
+                "SELECT element_id, type, status, last_updated FROM elements"
+                f"{where} ORDER BY last_updated DESC, element_id", params).fetchall()
+        return self._frame(rows)
+
+    def query(self, types=None, statuses=None, since=None):
+        """Elements matching every given filter, newest first (cached per revision)."""
+        key = ("elements", str(self.path), self.revision(),
+               tuple(sorted(types or ())), tuple(sorted(statuses or ())), since and _iso(since))
+        return frame_cache.get_or_load(key, lambda: self._fetch(types, statuses, since))
+
+    def changed_since(self, since):
+        return self.query(since=since)
+
+    def status_counts(self, types=None):
+        """Series of element counts per Status, over the given Types."""
+        where, params = self._where(types)
+        rows = self._conn().execute(
+            f"SELECT status, COUNT(*) FROM elements{where} GROUP BY status ORDER BY status", params).fetchall()
+        return pd.Series(dict(rows), name="Elements", dtype="int64").rename_axis("Status")
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+_seeded = set()   # paths already checked for seeding
+
+
+def get_store(path=DEFAULT_PATH, seed=False):
+    """Process-wide ElementStore for path; seed=True fills it with SEED_ROWS if empty (demo site only)."""
+    with _stores_lock:
+        store = _stores.get(str(path))
+        if store is None:
+            store = _stores[str(path)] = ElementStore(path)
+        if seed and str(path) not in _seeded:
+            store.seed()
+            _seeded.add(str(path))
+        return store
+
+
+if __name__ == "__main__":
+    # python element_store.py import updates.csv|xlsx [...]
+    if len(sys.argv) < 3 or sys.argv[1] != "import":
+        sys.exit("usage: python element_store.py import FILE [FILE ...]")
+    store = get_store()
+    for arg in sys.argv[2:]:
+        frame = pd.read_excel(arg) if arg.endswith((".xlsx", ".xls")) else pd.read_csv(arg)
+        print(f"{arg}: {store.upsert(frame):,} element(s) written, revision {store.revision()}")
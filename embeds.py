@@ -0,0 +1,262 @@
+"""
+Deferred Speckle / Google Maps embeds.
+
+A live Speckle viewer is a full WebGL app and a Maps embed is not much
+lighter. Mounting them eagerly dominates page load on a weak connection and
+memory on a kiosk PC. viewer() draws a placeholder card first: a cached static
+thumbnail of the model (or a plain gradient) with a play button. The live
+iframe is created client-side, either on click or when the card scrolls into
+view. The card's HTML is identical from one rerun to the next, so Streamlit
+leaves the frame alone and a mounted viewer stays mounted.
+
+viewer_group() keeps one slot per model the session has opened (e.g. each
+as-built date). Only the active slot has a height and the rest collapse to
+zero, so switching dates back and forth does not reload models that were
+already open.
+
+Lite mode (sidebar toggle, default from DASHBOARD_LITE_MODE=1) turns off the
+scroll trigger: nothing mounts until it is clicked.
+
+Thumbnails are looked up in visuals/thumbnails/<digest>.(webp|jpg|png), where
+digest is thumbnail_name(url). They are generated offline, by loading each
+embed in headless Chromium and saving a screenshot as a small WebP:
+
+    python embeds.py                      # every embed of every site (sites.json)
+    python embeds.py <url> [<url> ...]    # just these
+    python embeds.py --force              # recapture existing thumbnails
+    python embeds.py --image shot.png <url>   # use a screenshot taken by hand
+
+Capturing needs Playwright (pip install playwright && playwright install
+chromium) and Pillow; neither is needed to serve the dashboard. The change
+feed watches visuals/thumbnails/, so pages showing a new thumbnail rerun.
+"""
+import argparse
+import base64
+import hashlib
+import html
+import io
+import json
+import os
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+import streamlit as st
+
+try:
+    from PIL import Image
+except ImportError:  # no Pillow: thumbnails can be served but not generated
+    Image = None
+
+THUMBNAIL_DIR = Path("visuals/thumbnails")
+THUMBNAIL_TYPES = {".webp": "image/webp", ".jpg": "image/jpeg", ".png": "image/png"}
+MAX_THUMBNAIL_BYTES = 256 * 1024  # inlined as a data URI; larger files fall back to the gradient
+MAX_ALIVE = 3                     # hidden viewers kept mounted per group (each holds a WebGL context)
+CAPTURE_VIEWPORT = {"width": 1280, "height": 720}
+CAPTURE_SETTLE = 8.0              # seconds after the network goes quiet for a WebGL scene to draw
+THUMBNAIL_WIDTH = 640
+LITE_DEFAULT = os.environ.get("DASHBOARD_LITE_MODE") == "1"
+
+_CARD = """<!doctype html>
+<style>body{margin:0}</style>
+<div id="embed" style="position:relative;width:100%;height:$heightpx;border-radius:6px;overflow:hidden;
+     cursor:pointer;background:$background;font-family:sans-serif">
+  <div style="position:absolute;inset:0;display:flex;flex-direction:column;align-items:center;
+       justify-content:center;color:white;text-shadow:0 1px 3px rgba(0,0,0,.7)">
+    <div style="font-size:3rem;line-height:1">&#9654;</div>
+    <div style="font-weight:600;margin-top:.5rem">$title</div>
+    <div style="font-size:.8rem;opacity:.85">$hint</div>
+  </div>
+</div>
+<script>
+const box = document.getElementById("embed");
+function mount() {
+  if (box.dataset.mounted) return;
+  box.dataset.mounted = "1";
+  const frame = document.createElement("iframe");
+  frame.src = $src;
+  frame.allow = "fullscreen";
+  frame.style.cssText = "width:100%;height:100%;border:0";
+  box.replaceChildren(frame);
+  box.style.cursor = "auto";
+}
+box.addEventListener("click", mount);
+if ($auto) {
+  if ("IntersectionObserver" in window) {
+    new IntersectionObserver((entries, observer) => {
+      if (entries.some(e => e.isIntersecting)) { observer.disconnect(); mount(); }
+    }, {rootMargin: "200px"}).observe(box);
+  } else {
+    mount();
+  }
+}
+</script>
+"""
+
+
+def thumbnail_name(url):
+    return hashlib.sha1(url.encode()).hexdigest()[:16]
+
+
+def map_embed_url(lat, lon):
+    """Google Maps embed URL centred on a site, or None without coordinates."""
+    return f"https://maps.google.com/maps?q={lat},{lon}&z=18&output=embed" if lat is not None else None
+
+
+@lru_cache(maxsize=64)
+def _thumbnail_uri(path, mtime_ns):
+    data = path.read_bytes()
+    if len(data) > MAX_THUMBNAIL_BYTES:
+        return None
+    return f"data:{THUMBNAIL_TYPES[path.suffix]};base64,{base64.b64encode(data).decode()}"
+
+
+def thumbnail_uri(url):
+    """data: URI of the cached thumbnail for url, or None when there isn't one."""
+    stem = thumbnail_name(url)
+    for suffix in THUMBNAIL_TYPES:
+        path = THUMBNAIL_DIR / f"{stem}{suffix}"
+        try:
+            return _thumbnail_uri(path, path.stat().st_mtime_ns)
+        except FileNotFoundError:
+            continue
+    return None
+
+
+def lite_mode():
+    return st.session_state.get("lite_mode", LITE_DEFAULT)
+
+
+def lite_mode_toggle():
+    """Sidebar switch; in lite mode embeds only mount when clicked."""
+    st.sidebar.toggle("Lite mode", value=LITE_DEFAULT, key="lite_mode",
+                      help="Keep 3D models and maps as thumbnails until clicked.")
+
+
+@lru_cache(maxsize=32)
+def card_html(url, height, title, lite, thumbnail):
+    background = (f"url({thumbnail}) center/cover no-repeat, #264653" if thumbnail
+                  else "linear-gradient(135deg,#264653,#2A9D8F)")
+    hint = "Click to load" if lite else "Loads when scrolled into view, or click"
+    return (_CARD.replace("$height", str(int(height)))
+                 .replace("$background", background)
+                 .replace("$title", html.escape(title))
+                 .replace("$hint", hint)
+                 .replace("$src", json.dumps(url))
+                 .replace("$auto", "false" if lite else "true"))
+
+
+def viewer(url, height=650, title="3D model", width=None):
+    """Placeholder card for url that turns into the live embed on click or scroll."""
+    if not url:
+        st.info(f"No {title} linked for this site yet.")
+        return
+    st.components.v1.html(card_html(url, height, title, lite_mode(), thumbnail_uri(url)),
+                          height=height, width=width)
+
+
+def viewer_group(urls, active, key, height=650, title="3D model"):
+    """
+    One viewer slot per entry of urls the session has opened, in first-opened
+    order. Only `active` is shown; the others stay mounted at zero height.
+    """
+    alive = st.session_state.setdefault(f"{key}-alive", [])
+    if active in urls and active not in alive:
+        alive.append(active)
+        # Drop the oldest hidden viewer; this shifts the slots, so it reloads the rest once
+        while len(alive) > MAX_ALIVE + 1:
+            alive.pop(0 if alive[0] != active else 1)
+    lite = lite_mode()
+    for label in alive:
+        shown = label == active
+        st.components.v1.html(card_html(urls[label], height, f"{title} ({label})", lite, thumbnail_uri(urls[label])),
+                              height=height if shown else 0)
+
+
+def existing_thumbnail(url):
+    return next((p for p in (THUMBNAIL_DIR / f"{thumbnail_name(url)}{s}" for s in THUMBNAIL_TYPES)
+                 if p.exists()), None)
+
+
+def save_thumbnail(url, image_bytes):
+    """Store an image as url's thumbnail: WebP, at most THUMBNAIL_WIDTH wide and MAX_THUMBNAIL_BYTES."""
+    with Image.open(io.BytesIO(image_bytes)) as im:
+        im = im.convert("RGB")
+    im.thumbnail((THUMBNAIL_WIDTH, THUMBNAIL_WIDTH))
+    for quality in (80, 65, 50, 35):
+        buf = io.BytesIO()
+        im.save(buf, "WEBP", quality=quality, method=4)
+        if buf.tell() <= MAX_THUMBNAIL_BYTES:
+            break
+    else:
+        raise ValueError(f"thumbnail for {url} stays above {MAX_THUMBNAIL_BYTES:,} bytes")
+    THUMBNAIL_DIR.mkdir(parents=True, exist_ok=True)
+    path = THUMBNAIL_DIR / f"{thumbnail_name(url)}.webp"
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(buf.getvalue())
+    os.replace(tmp, path)
+    return path
+
+
+def capture_thumbnails(urls, settle=CAPTURE_SETTLE, log=print):
+    """Screenshot each url in headless Chromium and save it as its thumbnail."""
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as pw:
+        browser = pw.chromium.launch(args=["--use-gl=swiftshader", "--enable-webgl"])
+        try:
+            for url in urls:
+                page = browser.new_page(viewport=CAPTURE_VIEWPORT)
+                try:
+                    page.goto(url, wait_until="networkidle", timeout=60_000)
+                    page.wait_for_timeout(settle * 1000)
+                    log(f"{url}: {save_thumbnail(url, page.screenshot())}")
+                except Exception as exc:
+                    log(f"{url}: failed ({exc.__class__.__name__}: {exc}); the card keeps its gradient")
+                finally:
+                    page.close()
+        finally:
+            browser.close()
+
+
+def site_embed_urls():
+    """Every embed URL the dashboard shows, across the sites in the manifest."""
+    from sites import load_manifest
+
+    urls = []
+    for site in load_manifest().sites.values():
+        urls += [site.as_planned_url, site.drawing_url, *site.as_built_urls.values(),
+                 map_embed_url(site.lat, site.lon)]
+    return list(dict.fromkeys(u for u in urls if u))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("urls", nargs="*", help="embed URLs (default: every embed in the site manifest)")
+    parser.add_argument("--force", action="store_true", help="recapture URLs that already have a thumbnail")
+    parser.add_argument("--image", help="save this image file as the thumbnail of the single URL given")
+    args = parser.parse_args(argv)
+
+    if Image is None:
+        sys.exit("Pillow is not installed; thumbnails cannot be generated.")
+    if args.image:
+        if len(args.urls) != 1:
+            sys.exit("--image takes exactly one URL")
+        print(f"{args.urls[0]}: {save_thumbnail(args.urls[0], Path(args.image).read_bytes())}")
+        return
+    urls = args.urls or site_embed_urls()
+    todo = [u for u in urls if args.force or existing_thumbnail(u) is None]
+    for url in sorted(set(urls) - set(todo)):
+        print(f"{url}: {existing_thumbnail(url)} (exists)")
+    if not todo:
+        return
+    try:
+        import playwright  # noqa: F401
+    except ImportError:
+        sys.exit("Playwright is not installed (pip install playwright && playwright install chromium); "
+                 "use --image to save a screenshot taken by hand.")
+    capture_thumbnails(todo)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Earned Value Analysis engine.
+
+Computes EVA from the raw activity columns of a cost/progress export instead of
+trusting precomputed spreadsheet columns:
+
+  Planned Date, Actual Date, Planned Cost, Actual Cost, Actual Percentage
+
+Everything is vectorized over whole columns, so a 100k-activity schedule stays
+well inside an interactive rerun. See benchmarks/bench_eva_engine.py for the
+comparison against a row-by-row reference implementation.
+
+Definitions (per activity, and again per rollup group):
+  BAC   budget at completion        = Planned Cost
+  BCWS  planned value at status     = Planned Cost if Planned Date <= status date
+  BCWP  earned value                = Planned Cost * Actual Percentage / percent scale
+  ACWP  actual cost                 = Actual Cost
+  SV = BCWP - BCWS    CV = BCWP - ACWP    SPI = BCWP / BCWS    CPI = BCWP / ACWP
+  EAC = BAC / CPI     ETC = EAC - ACWP    VAC = BAC - EAC
+  TCPI = (BAC - BCWP) / (BAC - ACWP)
+Ratios with a zero (or undefined) denominator come out as NaN.
+
+Actual Percentage is read on a fixed scale, a 0-1 fraction by default as in
+the original exports. A value above the scale is rejected with a ValueError
+rather than guessed at, since a 0-100 export read as fractions (or the
+reverse) silently misstates BCWP, SPI and CPI.
+
+Environment:
+  DASHBOARD_EVA_PERCENT_SCALE   what 100% complete is in Actual Percentage: 1 or 100 (default 1)
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+RAW_COLUMNS = ["Planned Date", "Actual Date", "Planned Cost", "Actual Cost", "Actual Percentage"]
+BASE_COLUMNS = ["BAC", "BCWS", "BCWP", "ACWP"]
+INDEX_COLUMNS = ["SV", "CV", "SPI", "CPI", "EAC", "ETC", "VAC", "TCPI"]
+PERCENT_SCALE = float(os.environ.get("DASHBOARD_EVA_PERCENT_SCALE", "1"))
+
+
+def _ratio(num, den):
+    num = np.asarray(num, dtype="float64")
+    den = np.asarray(den, dtype="float64")
+    out = np.full(np.broadcast(num, den).shape, np.nan)
+    np.divide(num, den, out=out, where=den != 0)
+    return out
+
+
+def add_indices(frame):
+    """Add SV/CV/SPI/CPI/EAC/ETC/VAC/TCPI to a frame holding BAC/BCWS/BCWP/ACWP."""
+    bac, bcws, bcwp, acwp = (frame[c].to_numpy("float64") for c in BASE_COLUMNS)
+    cpi = _ratio(bcwp, acwp)
+    eac = _ratio(bac, np.where(cpi > 0, cpi, np.nan))
+    frame["SV"] = bcwp - bcws
+    frame["CV"] = bcwp - acwp
+    frame["SPI"] = _ratio(bcwp, bcws)
+    frame["CPI"] = cpi
+    frame["EAC"] = eac
+    frame["ETC"] = eac - acwp
+    frame["VAC"] = bac - eac
+    frame["TCPI"] = _ratio(bac - bcwp, bac - acwp)
+    return frame
+
+
+def _percent_fraction(values, scale):
+    pct = pd.to_numeric(values, errors="coerce").fillna(0.0).to_numpy("float64")
+    if pct.size and pct.max() > scale * (1 + 1e-9):
+        raise ValueError(f"Actual Percentage goes up to {pct.max():g}, above the percent scale of {scale:g} "
+                         f"(set DASHBOARD_EVA_PERCENT_SCALE for 0-100 exports)")
+    return np.clip(pct / scale, 0.0, 1.0)
+
+
+def _check_columns(raw):
+    missing = [c for c in RAW_COLUMNS if c not in raw.columns]
+    if missing:
+        raise KeyError(f"EVA data is missing column(s): {', '.join(missing)}")
+
+
+def _status(status_date):
+    return pd.Timestamp.today().normalize() if status_date is None else pd.Timestamp(status_date)
+
+
+def _base_arrays(frame, status, percent_scale):
+    """BAC, BCWS, BCWP, ACWP per row of a raw export, as float arrays."""
+    bac = pd.to_numeric(frame["Planned Cost"], errors="coerce").fillna(0.0).to_numpy("float64")
+    acwp = pd.to_numeric(frame["Actual Cost"], errors="coerce").fillna(0.0).to_numpy("float64")
+    due = (pd.to_datetime(frame["Planned Date"], errors="coerce") <= status).to_numpy()
+    return bac, np.where(due, bac, 0.0), bac * _percent_fraction(frame["Actual Percentage"], percent_scale), acwp
+
+
+def eva_totals(raw, status_date=None, percent_scale=PERCENT_SCALE):
+    """BAC/BCWS/BCWP/ACWP totals of a raw export, without the per-activity frame."""
+    _check_columns(raw)
+    arrays = _base_arrays(raw, _status(status_date), percent_scale)
+    return {col: float(values.sum()) for col, values in zip(BASE_COLUMNS, arrays)}
+
+
+def compute_eva(raw, status_date=None, percent_scale=PERCENT_SCALE):
+    """
+    Per-activity EVA for a raw export.
+
+    Returns a new frame sorted by Planned Date with the original columns plus
+    BAC/BCWS/BCWP/ACWP, the indices above, and cumulative curves
+    Cum Planned (baseline, all activities), Cum BCWS, Cum BCWP and Cum ACWP.
+    """
+    _check_columns(raw)
+    status = _status(status_date)
+
+    eva = raw.copy(deep=False)
+    eva["Planned Date"] = pd.to_datetime(eva["Planned Date"], errors="coerce")
+    eva["Actual Date"] = pd.to_datetime(eva["Actual Date"], errors="coerce")
+    eva = eva.sort_values("Planned Date", kind="stable", ignore_index=True)
+
+    bac, bcws, bcwp, acwp = _base_arrays(eva, status, percent_scale)
+    eva["BAC"] = bac
+    eva["BCWS"] = bcws
+    eva["BCWP"] = bcwp
+    eva["ACWP"] = acwp
+    add_indices(eva)
+
+    eva["Cum Planned"] = np.cumsum(bac)
+    for col in ["BCWS", "BCWP", "ACWP"]:
+        eva[f"Cum {col}"] = np.cumsum(eva[col].to_numpy())
+    return eva
+
+
+def summarize(eva):
+    """Project-level totals and indices as a dict (keys as in BASE/INDEX_COLUMNS)."""
+    totals = pd.DataFrame([eva[BASE_COLUMNS].sum()])
+    add_indices(totals)
+    summary = totals.iloc[0].to_dict()
+    summary["Percent Complete"] = float(_ratio(summary["BCWP"], summary["BAC"]))
+    return summary
+
+
+def _rollup(eva, keys):
+    grouped = eva.groupby(keys, sort=True, observed=True)[BASE_COLUMNS].sum()
+    return add_indices(grouped)
+
+
+def wbs_prefix(codes, level, sep="."):
+    """Truncate WBS codes like '1.2.3' to their first `level` segments."""
+    # Split only the distinct codes, then broadcast back through the factorized codes
+    labels, uniques = pd.factorize(pd.Series(codes).astype(str), sort=False)
+    prefixes = np.array([sep.join(u.split(sep)[:level]) for u in uniques], dtype=object)
+    out = prefixes[labels] if len(prefixes) else np.empty(0, dtype=object)
+    return pd.Series(out, index=getattr(codes, "index", None), name=f"WBS L{level}")
+
+
+def rollup_wbs(eva, level, wbs_col="WBS"):
+    """EVA totals and indices per WBS group truncated to `level`."""
+    return _rollup(eva, wbs_prefix(eva[wbs_col], level))
+
+
+def rollup_period(eva, freq="M", status_date=None):
+    """
+    EVA per reporting period with cumulative columns.
+
+    Planned value is booked in the period of the Planned Date; earned value and
+    actual cost in the period of the Actual Date (or the status date when an
+    activity has no actual date yet).
+    """
+    status = pd.Timestamp.today().normalize() if status_date is None else pd.Timestamp(status_date)
+    planned_period = eva["Planned Date"].dt.to_period(freq)
+    actual_period = eva["Actual Date"].fillna(status).dt.to_period(freq)
+
+    planned = eva[["BAC", "BCWS"]].groupby(planned_period, observed=True).sum()
+    actual = eva[["BCWP", "ACWP"]].groupby(actual_period, observed=True).sum()
+    periods = planned.join(actual, how="outer").fillna(0.0).sort_index()
+    periods.index.name = "Period"
+
+    cumulative = periods[BASE_COLUMNS].cumsum()
+    periods["Cum Planned"] = cumulative["BAC"]
+    for col in ["BCWS", "BCWP", "ACWP"]:
+        periods[f"Cum {col}"] = cumulative[col]
+    # Indices read against cumulative values as on a status report, with
+    # EAC/ETC/VAC/TCPI measured against the whole budget
+    cumulative["BAC"] = periods["BAC"].sum()
+    add_indices(cumulative)
+    periods[INDEX_COLUMNS] = cumulative[INDEX_COLUMNS]
+    return periods
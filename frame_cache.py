@@ -0,0 +1,211 @@
+"""
+Process-wide cache of parsed workbooks.
+
+Streamlit re-executes dashboard.py on every interaction, but imported modules
+stay loaded, so anything kept at module level here is shared by every rerun
+and every browser session of the server process.
+
+Keys:
+  - disk files  -> (resolved path, mtime_ns, size, read options)
+  - uploads     -> (sha1 of uploaded bytes, read options)
+
+Entries are evicted least-recently-used once the total in-memory size of the
+cached frames passes DASHBOARD_CACHE_MB (default 512 MB).
+
+Frames handed out are read-only with respect to the cache: each caller gets
+a shallow copy and pandas copy-on-write is enabled, so adding or replacing a
+column (eva_df["Planned Date"] = ...) or writing through .loc only ever
+touches the caller's copy, while the column data itself stays shared.
+
+Workbooks are stored compact: dates parsed, repeated text as categoricals and
+integers downcast. Workbooks that precompute.py has converted are
+memory-mapped from their Arrow copies instead of being parsed (see
+columnar.py). Stale or missing copies fall back to Excel transparently.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+
+import columnar
+import metrics
+
+# Shallow copies only stay isolated under copy-on-write (always on from pandas 3)
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+DEFAULT_MAX_BYTES = int(float(os.environ.get("DASHBOARD_CACHE_MB", "512")) * 1024 * 1024)
+
+
+def frame_nbytes(df):
+    # Deep size so object/text columns are counted properly
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def compact_frame(df, max_category_ratio=0.5):
+    """Columnar-compact copy: repeated text -> category, integers downcast."""
+    out = {}
+    for name, col in df.items():
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            pass
+        elif pd.api.types.is_object_dtype(col) or pd.api.types.is_string_dtype(col):
+            if len(col) and col.nunique(dropna=True) <= max_category_ratio * len(col):
+                col = col.astype("category")
+        elif pd.api.types.is_integer_dtype(col) and not pd.api.types.is_bool_dtype(col):
+            col = pd.to_numeric(col, downcast="integer")
+        out[name] = col
+    return pd.DataFrame(out, index=df.index)
+
+
+class FrameCache:
+    """Thread-safe LRU of DataFrames bounded by total memory."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # key -> (frame, nbytes)
+        self._inflight = {}             # key -> Event while a load is running
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def get_or_load(self, key, loader):
+        """Return a read-only copy of the cached frame, loading it once on a miss."""
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    metrics.incr("cache_hits")
+                    return entry[0].copy(deep=False)
+                waiter = self._inflight.get(key)
+                if waiter is None:
+                    # We own the load; concurrent callers wait on the event
+                    self._inflight[key] = threading.Event()
+                    self.misses += 1
+                    metrics.incr("cache_misses")
+                    break
+            waiter.wait()
+
+        try:
+            df = loader()
+            self._store(key, df)
+            return df.copy(deep=False)
+        finally:
+            with self._lock:
+                self._inflight.pop(key).set()
+
+    def _store(self, key, df):
+        nbytes = frame_nbytes(df)
+        with self._lock:
+            # A file that changed on disk gets a new key; drop its older versions
+            stale = [
+                k for k in self._entries
+                if k == key or (k[0] == "file" and k[:2] == key[:2] and k[2:4] != key[2:4])
+            ]
+            for k in stale:
+                self.total_bytes -= self._entries.pop(k)[1]
+            if nbytes > self.max_bytes:
+                # Larger than the whole budget: hand it out but don't keep it
+                return
+            self._entries[key] = (df, nbytes)
+            self.total_bytes += nbytes
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted
+
+    def frames(self):
+        """The cached frames themselves (for memory accounting; do not modify)."""
+        with self._lock:
+            return [frame for frame, _ in self._entries.values()]
+
+    def invalidate(self, predicate=None):
+        """Drop every entry (or only those whose key matches predicate)."""
+        with self._lock:
+            for key in [k for k in self._entries if predicate is None or predicate(k)]:
+                _, nbytes = self._entries.pop(key)
+                self.total_bytes -= nbytes
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Shared by every session in this server process
+frame_cache = FrameCache()
+
+
+def source_key(source):
+    """Cache key for a path on disk or an uploaded file-like object."""
+    if isinstance(source, (str, os.PathLike)):
+        path = Path(source).resolve()
+        stat = path.stat()
+        return ("file", str(path), stat.st_mtime_ns, stat.st_size)
+    data = source.getvalue()
+    return ("upload", hashlib.sha1(data).hexdigest())
+
+
+def parse_excel(source, **kwargs):
+    """pd.read_excel on a path or upload, timed and counted in metrics."""
+    kwargs.setdefault("engine", "openpyxl")
+    if isinstance(source, (str, os.PathLike)):
+        metrics.incr("bytes_read", Path(source).stat().st_size)
+    else:
+        metrics.incr("bytes_read", len(source.getvalue()))
+        source.seek(0)
+    with metrics.timer("excel_parse"):
+        return pd.read_excel(source, **kwargs)
+
+
+def load_workbook(source, **kwargs):
+    """
+    Compact frame for a workbook: its precomputed Arrow copy when fresh, else
+    parse_excel. Repeated text comes back as categoricals either way.
+    """
+    with metrics.timer("columnar_read"):
+        frame = columnar.load(source, **kwargs)
+    if frame is not None:
+        # Already compacted by precompute.py; returned as is so the columns stay memory-mapped
+        metrics.incr("columnar_hits")
+        return frame
+    return compact_frame(columnar.normalize(parse_excel(source, **kwargs)))
+
+
+def excel_key(source, version=None, **kwargs):
+    """Cache key read_excel_cached uses for source with these kwargs."""
+    kwargs.setdefault("engine", "openpyxl")
+    return (version or source_key(source)) + (repr(sorted(kwargs.items())),)
+
+
+def read_excel_cached(source, version=None, **kwargs):
+    """
+    pd.read_excel through the shared cache; kwargs are part of the key.
+    version is source_key(source) when the caller already has it (saves
+    re-hashing an upload).
+    """
+    return frame_cache.get_or_load(excel_key(source, version, **kwargs), lambda: load_workbook(source, **kwargs))
+
+
+def read_derived_cached(source, aggregate, compute, version=None):
+    """
+    A derived series of the workbook at source (e.g. "scurve"), shared by all
+    sessions: memory-mapped when precompute.py wrote a fresh copy, else compute().
+    version as in read_excel_cached.
+    """
+    path = columnar.fresh(source, aggregate) if isinstance(source, (str, os.PathLike)) else None
+    loader = (lambda: columnar.read_table(path)) if path is not None else compute
+    return frame_cache.get_or_load((version or source_key(source)) + ("derived", aggregate), loader)
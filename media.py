@@ -0,0 +1,273 @@
+"""
+Derived images for the site photos and progress GIFs.
+
+st.image(path) ships the source file as-is, and a progress GIF can be tens of
+MB. The first time a file is shown, the pipeline queues a size-appropriate
+variant keyed by the file's content hash:
+
+  still images     WebP (JPEG when Pillow has no WebP codec) at 480/960/1600 px
+  animated GIFs    MP4 via ffmpeg when it is on PATH, otherwise animated WebP
+                   (skipped when its decoded frames would pass
+                   DASHBOARD_MEDIA_MAX_DECODE_MB)
+
+Variants are built one at a time by a background worker, never on the script
+thread: until a variant is ready the original is served, and the next rerun
+after it lands picks it up.
+
+Variants live in an on-disk cache that is shared by every session and
+survives restarts. The least recently served files are evicted past the size
+limit. A variant that comes out larger than its source is never used; the
+original is served instead. Pillow is optional: without it every file is
+served unchanged.
+
+show() picks the smallest variant at least as wide as the column and offers
+the original behind a toggle. To build variants ahead of time:
+
+    python media.py visuals/*.gif visuals/*.png
+
+Environment:
+  DASHBOARD_MEDIA_CACHE      cache directory (default .media_cache)
+  DASHBOARD_MEDIA_CACHE_MB   size limit before eviction (default 512)
+  DASHBOARD_MEDIA_MAX_DECODE_MB  decoded frame memory an animated WebP may use (default 256)
+"""
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import metrics
+
+try:
+    from PIL import Image, ImageSequence, features
+except ImportError:  # Pillow not installed: originals only
+    Image = None
+
+CACHE_DIR = Path(os.environ.get("DASHBOARD_MEDIA_CACHE", ".media_cache"))
+CACHE_MAX_BYTES = int(float(os.environ.get("DASHBOARD_MEDIA_CACHE_MB", "512")) * 2**20)
+MAX_DECODE_BYTES = int(float(os.environ.get("DASHBOARD_MEDIA_MAX_DECODE_MB", "256")) * 2**20)
+WIDTHS = (480, 960, 1600)
+FFMPEG = shutil.which("ffmpeg")
+WEBP = Image is not None and features.check("webp")
+
+# path: file to send, kind: "image" or "video", nbytes: its size, original: True if unconverted
+Media = namedtuple("Media", ["path", "kind", "nbytes", "original"])
+
+_lock = threading.Lock()
+_hashes = {}        # (path, mtime_ns, size) -> content hash
+_pending = {}       # variant name -> Future, so each variant is queued once
+_failed = set()     # variant names whose build raised; served as originals until restart
+_executor = None
+
+
+def content_hash(path):
+    """sha1 of the file contents, memoized on (path, mtime, size)."""
+    stat = path.stat()
+    stamp = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+    digest = _hashes.get(stamp)
+    if digest is None:
+        h = hashlib.sha1()
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                h.update(chunk)
+        digest = _hashes[stamp] = h.hexdigest()
+    return digest
+
+
+def pick_width(width):
+    """Smallest standard width that covers `width` pixels."""
+    return next((w for w in WIDTHS if w >= width), WIDTHS[-1])
+
+
+def _is_animated(path):
+    with Image.open(path) as im:
+        return getattr(im, "is_animated", False)
+
+
+def _resized(frame, width):
+    if frame.width <= width:
+        return frame
+    return frame.resize((width, max(round(frame.height * width / frame.width), 1)), Image.LANCZOS)
+
+
+def _build_still(src, dest, width):
+    with Image.open(src) as im:
+        im = _resized(im, width)
+        if WEBP:
+            im.save(dest, "WEBP", quality=80, method=4)
+        else:
+            im.convert("RGB").save(dest, "JPEG", quality=85, optimize=True, progressive=True)
+
+
+def _build_animated_webp(src, dest, width):
+    # Pillow's encoder needs every frame at once; refuse GIFs whose frames would not fit
+    with Image.open(src) as im:
+        scale = min(width / im.width, 1.0)
+        decoded = getattr(im, "n_frames", 1) * round(im.width * scale) * round(im.height * scale) * 4
+        if decoded > MAX_DECODE_BYTES:
+            return False
+        frames, durations = [], []
+        for frame in ImageSequence.Iterator(im):
+            frames.append(_resized(frame.convert("RGBA"), width))
+            durations.append(frame.info.get("duration", 100))
+        frames[0].save(dest, "WEBP", save_all=True, append_images=frames[1:], duration=durations,
+                       loop=im.info.get("loop", 0), quality=60, method=4)
+
+
+def _build_mp4(src, dest, width):
+    # Even dimensions for yuv420p; never upscale
+    scale = f"scale=trunc(min(iw\\,{width})/2)*2:-2"
+    subprocess.run([FFMPEG, "-y", "-loglevel", "error", "-i", str(src), "-vf", scale,
+                    "-movflags", "faststart", "-pix_fmt", "yuv420p", "-an", str(dest)],
+                   check=True, timeout=600)
+
+
+def _plan(src, width):
+    """(variant file name suffix, builder, kind) for src."""
+    if _is_animated(src):
+        if FFMPEG:
+            return ".mp4", _build_mp4, "video"
+        if WEBP:
+            return ".anim.webp", _build_animated_webp, "image"
+        return None
+    return (".webp" if WEBP else ".jpg"), _build_still, "image"
+
+
+def _touch(path):
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def evict(max_bytes=CACHE_MAX_BYTES):
+    """Delete least recently served variants until the cache fits max_bytes."""
+    if not CACHE_DIR.is_dir():
+        return
+    entries = []
+    for path in CACHE_DIR.iterdir():
+        if path.name.startswith(".") and ".tmp" in path.name:
+            continue  # another thread's variant in progress
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        metrics.incr("media_evictions")
+
+
+def _cached(stem, original):
+    """Media for an already built variant, the original if it was skipped, else None."""
+    for suffix, kind in ((".mp4", "video"), (".anim.webp", "image"), (".webp", "image"), (".jpg", "image")):
+        done = CACHE_DIR / f"{stem}{suffix}"
+        if done.exists():
+            _touch(done)
+            return Media(done, kind, done.stat().st_size, False)
+    if (CACHE_DIR / f"{stem}.skip").exists():
+        return original
+    return None
+
+
+def _worker():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="media-variant")
+        return _executor
+
+
+def _build(src, stem, width, original):
+    """Build one variant into the cache; returns its Media, or the original if it was skipped."""
+    try:
+        # Queued twice before the first build landed
+        found = _cached(stem, original)
+        if found is not None:
+            return found
+        plan = _plan(src, width)
+        if plan is None:
+            return original
+        suffix, build, kind = plan
+        dest = CACHE_DIR / f"{stem}{suffix}"
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(f".{dest.name}.{threading.get_ident()}.tmp{suffix}")
+        with metrics.timer("media_convert"):
+            built = build(src, tmp, width) is not False
+        if not built or tmp.stat().st_size >= original.nbytes:
+            # Too large to convert or already compact; remember that instead of trying again
+            tmp.unlink(missing_ok=True)
+            (CACHE_DIR / f"{stem}.skip").touch()
+            return original
+        os.replace(tmp, dest)
+        evict()
+        return Media(dest, kind, dest.stat().st_size, False)
+    except Exception:
+        # A corrupt or unsupported file is still shown, just not converted
+        metrics.incr("media_errors")
+        with _lock:
+            _failed.add(stem)
+        return original
+    finally:
+        with _lock:
+            _pending.pop(stem, None)
+
+
+def variant(src, width, wait=False):
+    """
+    Media record for the smallest servable version of src at `width` px. A
+    variant not built yet is queued and the original returned, unless wait=True.
+    """
+    src = Path(src)
+    original = Media(src, "image", src.stat().st_size, True)
+    if Image is None:
+        return original
+    width = pick_width(width)
+    stem = f"{content_hash(src)}-{width}"
+    found = _cached(stem, original)
+    if found is not None:
+        return found
+
+    worker = _worker()
+    with _lock:
+        if stem in _failed:
+            return original
+        future = _pending.get(stem)
+        if future is None:
+            future = _pending[stem] = worker.submit(_build, src, stem, width, original)
+    if wait:
+        return future.result()
+    metrics.incr("media_pending")
+    return original
+
+
+def show(container, src, caption, key, width=960):
+    """
+    Render src in container (st or a column) using the variant for `width` px,
+    with a toggle that swaps in the original file.
+    """
+    media = variant(src, width)
+    if not media.original and container.toggle("Full resolution", key=key):
+        media = Media(Path(src), "image", Path(src).stat().st_size, True)
+    metrics.incr("media_bytes", media.nbytes)
+    if media.kind == "video":
+        container.video(str(media.path), autoplay=True, loop=True, muted=True)
+        container.caption(caption)
+    else:
+        container.image(str(media.path), caption=caption, use_container_width=True)
+    return media
+
+
+if __name__ == "__main__":
+    for arg in sys.argv[1:]:
+        for w in WIDTHS:
+            m = variant(arg, w, wait=True)
+            print(f"{arg} @{w}px -> {m.path} ({m.nbytes:,} B{', original' if m.original else ''})")
@@ -0,0 +1,178 @@
+"""
+Lightweight hot-path instrumentation.
+
+Each Streamlit rerun runs on its own script thread, so the rerun being
+recorded is kept in a thread-local. Code anywhere on that thread can call
+
+    with timer("excel_parse"): ...     # wall time, in seconds
+    incr("cache_hits")                 # counters: hits, bytes read, rows rendered
+    observe("weather_request", secs)   # latencies measured off the script thread
+
+and the numbers land both in the current rerun's record and in process-wide
+aggregates labelled by page. Calls from background threads (e.g. the weather
+fetcher) only update the aggregates, under page "-".
+
+Exports:
+  prometheus_text()   Prometheus text exposition of the aggregates
+  jsonl()             the most recent reruns, one JSON object per line
+  start_http_server() optional /metrics and /reruns.jsonl endpoint,
+                      enabled by DASHBOARD_METRICS_PORT in dashboard.py; it
+                      listens on localhost unless DASHBOARD_METRICS_HOST says
+                      otherwise
+"""
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MAX_RERUNS = 500
+
+_local = threading.local()
+_lock = threading.Lock()
+_timings = defaultdict(lambda: [0, 0.0, 0.0])   # (name, page) -> [count, sum, max]
+_counters = defaultdict(float)                   # (name, page) -> total
+_reruns = deque(maxlen=MAX_RERUNS)
+_server = None
+
+
+def current():
+    """The record of the rerun running on this thread, or None."""
+    return getattr(_local, "record", None)
+
+
+def observe(name, seconds):
+    record = current()
+    page = record["page"] if record else "-"
+    with _lock:
+        stat = _timings[(name, page)]
+        stat[0] += 1
+        stat[1] += seconds
+        stat[2] = max(stat[2], seconds)
+    if record is not None:
+        record["timings"][name] = record["timings"].get(name, 0.0) + seconds
+
+
+def incr(name, value=1):
+    record = current()
+    page = record["page"] if record else "-"
+    with _lock:
+        _counters[(name, page)] += value
+    if record is not None:
+        record["counters"][name] = record["counters"].get(name, 0) + value
+
+
+@contextmanager
+def timer(name):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - t0)
+
+
+@contextmanager
+def rerun(page, session_id=None, profile=False):
+    """
+    Record one rerun of `page`. With profile=True the body runs under cProfile
+    and the top functions by cumulative time are kept in record["profile"].
+    """
+    record = {"ts": time.time(), "page": page, "session": session_id, "timings": {}, "counters": {}}
+    _local.record = record
+    profiler = cProfile.Profile() if profile else None
+    t0 = time.perf_counter()
+    try:
+        if profiler:
+            profiler.enable()
+        yield record
+    finally:
+        if profiler:
+            profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(40)
+            record["profile"] = out.getvalue()
+        observe("rerun", time.perf_counter() - t0)
+        _local.record = None
+        with _lock:
+            _reruns.append({k: v for k, v in record.items() if k != "profile"})
+
+
+def snapshot():
+    """Copy of the aggregates: (timings, counters) keyed by (name, page)."""
+    with _lock:
+        return {k: tuple(v) for k, v in _timings.items()}, dict(_counters)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _labels(name, page):
+    return f'{{name="{_escape(name)}",page="{_escape(page)}"}}'
+
+
+def prometheus_text():
+    timings, counters = snapshot()
+    lines = [
+        "# HELP dashboard_duration_seconds Time spent in instrumented sections.",
+        "# TYPE dashboard_duration_seconds summary",
+    ]
+    for (name, page), (count, total, _) in sorted(timings.items()):
+        lines.append(f"dashboard_duration_seconds_count{_labels(name, page)} {count}")
+        lines.append(f"dashboard_duration_seconds_sum{_labels(name, page)} {total:.6f}")
+    lines += [
+        "# HELP dashboard_duration_seconds_max Slowest single observation.",
+        "# TYPE dashboard_duration_seconds_max gauge",
+    ]
+    for (name, page), (_, _, worst) in sorted(timings.items()):
+        lines.append(f"dashboard_duration_seconds_max{_labels(name, page)} {worst:.6f}")
+    lines += [
+        "# HELP dashboard_events_total Cache hits/misses, bytes read, rows rendered, errors.",
+        "# TYPE dashboard_events_total counter",
+    ]
+    for (name, page), value in sorted(counters.items()):
+        lines.append(f"dashboard_events_total{_labels(name, page)} {value:g}")
+    return "\n".join(lines) + "\n"
+
+
+def recent_reruns():
+    with _lock:
+        return list(_reruns)
+
+
+def jsonl():
+    return "".join(json.dumps(r, default=str) + "\n" for r in recent_reruns())
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/metrics"):
+            body, ctype = prometheus_text(), "text/plain; version=0.0.4"
+        elif self.path.startswith("/reruns.jsonl"):
+            body, ctype = jsonl(), "application/x-ndjson"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_http_server(port, host="127.0.0.1"):
+    """Serve /metrics and /reruns.jsonl on a daemon thread (once per process)."""
+    global _server
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, int(port)), _Handler)
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    return _server
@@ -0,0 +1,135 @@
+"""
+Offline precompute: convert the site workbooks to memory-mappable Arrow files.
+
+    python precompute.py                  # every site's data folder (sites.json)
+    python precompute.py data other/data  # just these folders
+    python precompute.py --force          # rebuild everything
+    python precompute.py --check          # exit 1 if any workbook needs rebuilding or restamping
+
+Each <folder>/*.xlsx is parsed once and written to <folder>/.precomputed/ (see
+columnar.py for the layout) with normalized dtypes:
+
+  *Date columns             datetime64 (e.g. Planned Date, Actual Date)
+  cost/quantity/% columns   numeric, when every value parses as a number
+  repeated text             categorical
+
+plus derived aggregates the pages chart directly:
+
+  <name>.scurve.arrow   Planned Date, Cum Planned, Cum BCWP, Cum ACWP (EVA exports)
+  <name>.delays.arrow   Planned Date, Activities, Delay Days (any Planned/Actual Date sheet)
+
+The manifest records each source's sha1, mtime and size. A workbook whose
+mtime and size are unchanged is skipped without being read. One that was only
+touched (same sha1) just has its stamp updated, so reruns are cheap and only
+edited workbooks are reparsed. Run it after dropping in new exports; until
+then the dashboard keeps parsing the Excel files.
+"""
+import argparse
+import hashlib
+import sys
+import time
+from pathlib import Path
+
+import columnar
+from frame_cache import compact_frame, parse_excel
+
+
+def file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def convert(source):
+    """Parse, normalize and write source's Arrow files; returns the output file names."""
+    frame = compact_frame(columnar.normalize(parse_excel(source)))
+    outputs = {columnar.table_path(source): frame}
+    for aggregate, derived in columnar.derive(frame).items():
+        outputs[columnar.table_path(source, aggregate)] = derived
+    for path, out in outputs.items():
+        columnar.write_table(out, path)
+    return sorted(path.name for path in outputs)
+
+
+def _outputs_exist(folder, entry):
+    return all((folder / name).exists() for name in entry["outputs"])
+
+
+def precompute_folder(folder, force=False, check=False, log=print):
+    """Bring folder's .precomputed/ up to date; returns the number of workbooks (re)built."""
+    folder = Path(folder)
+    out = folder / columnar.OUT_DIR
+    entries = dict(columnar.read_manifest(out))
+    workbooks = sorted(p for p in folder.glob("*.xlsx") if not p.name.startswith("~$"))
+    changed = built = 0
+    for source in workbooks:
+        stat = source.stat()
+        stamp = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+        entry = entries.get(source.name)
+        current = entry is not None and _outputs_exist(out, entry) and not force
+        if current and (entry["mtime_ns"], entry["size"]) == (stamp["mtime_ns"], stamp["size"]):
+            continue
+        digest = file_sha1(source)
+        if current and entry["sha1"] == digest:
+            if check:
+                # The dashboard trusts mtime and size, so this copy is unused until the stamp is rewritten
+                log(f"{source}: touched, manifest stamp needs rewriting")
+                built += 1
+                continue
+            entries[source.name] = {**entry, **stamp}
+            changed += 1
+            log(f"{source}: unchanged (touched)")
+            continue
+        if check:
+            log(f"{source}: needs rebuilding")
+            built += 1
+            continue
+        t0 = time.perf_counter()
+        try:
+            outputs = convert(source)
+        except Exception as exc:
+            log(f"{source}: failed ({exc.__class__.__name__}: {exc}); the dashboard will read the Excel file")
+            entries.pop(source.name, None)
+            changed += 1
+            continue
+        entries[source.name] = {"sha1": digest, **stamp, "outputs": outputs}
+        changed += 1
+        built += 1
+        log(f"{source}: {', '.join(outputs)} in {time.perf_counter() - t0:.2f} s")
+
+    present = {p.name for p in workbooks}
+    for name in [n for n in entries if n not in present]:
+        for output in entries.pop(name)["outputs"]:
+            (out / output).unlink(missing_ok=True)
+        changed += 1
+        log(f"{folder / name}: removed (workbook deleted)")
+    if changed and not check:
+        out.mkdir(parents=True, exist_ok=True)
+        columnar.write_manifest(out, entries)
+    return built
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folders", nargs="*", help="data folders (default: every site in the manifest)")
+    parser.add_argument("--force", action="store_true", help="rebuild even unchanged workbooks")
+    parser.add_argument("--check", action="store_true", help="report stale workbooks without building")
+    args = parser.parse_args(argv)
+
+    if columnar.pa is None:
+        sys.exit("pyarrow is not installed; the dashboard reads the Excel files directly.")
+    folders = args.folders
+    if not folders:
+        from sites import load_manifest
+
+        folders = [site.data_dir for site in load_manifest().sites.values()]
+    built = sum(precompute_folder(f, args.force, args.check) for f in folders if Path(f).is_dir())
+    print(f"{built} workbook(s) {'stale' if args.check else 'built'}")
+    if args.check and built:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
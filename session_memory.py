@@ -0,0 +1,236 @@
+"""
+Per-session memory accounting and budget.
+
+Workbook data is shared. Every session gets a shallow copy of the same cached
+frame (frame_cache.py), text is stored as categoricals, and page-level series
+(S-curve, delays) are cached once per file version. What a session still holds
+on its own is:
+
+  state     st.session_state values; frames count only buffers the frame
+            cache does not already hold
+  uploads   files held by the session's keyed file_uploader widgets (their
+            values in st.session_state)
+  media     images and videos on the session's page that no other session
+            shows (Streamlit stores identical media once, by content hash)
+
+Streamlit has no public API for a session's media, so media is read from
+MediaFileManager internals, and only on the Streamlit releases listed in
+MEDIA_INTERNALS_CHECKED. On any other release it is reported as None (not
+measured) and left out of the total.
+
+account() measures these after each rerun and keeps the latest figures per
+session. report() sums them per session and per page for the debug panel.
+
+A session over budget first loses its droppable state (e.g. profiler
+output). If it is still over, the page shows a warning, and fits_upload()
+lets a page refuse an upload that would not fit. A refused upload is cleared
+by giving its widget a new key, never by deleting the file under it.
+
+Environment:
+  DASHBOARD_SESSION_BUDGET_MB   per-session budget (default 64)
+"""
+import fnmatch
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.uploaded_file_manager import UploadedFile
+
+import metrics
+from frame_cache import frame_cache
+
+BUDGET_BYTES = int(float(os.environ.get("DASHBOARD_SESSION_BUDGET_MB", "64")) * 2**20)
+DROPPABLE = ("last_profile",)   # session_state keys (fnmatch patterns) released over budget
+# (major, minor) Streamlit releases whose MediaFileManager internals _media_bytes was checked against
+MEDIA_INTERNALS_CHECKED = {(1, 65)}
+
+# state/uploads/media/total in bytes (media None when not measurable), ts: time.time() of the measurement
+Usage = namedtuple("Usage", ["session", "page", "state", "uploads", "media", "total", "ts"])
+
+
+def _buffers(values):
+    """(identity, nbytes) of the memory buffers behind one column's values."""
+    if isinstance(values, pd.Categorical):
+        yield from _buffers(values.codes)
+        yield from _buffers(values.categories.array)
+        return
+    chunks = getattr(values, "_pa_array", None)
+    if chunks is not None:
+        for chunk in chunks.chunks:
+            for buf in chunk.buffers():
+                if buf is not None:
+                    yield ("arrow", buf.address), buf.size
+        return
+    array = np.asarray(values)
+    root = array
+    while isinstance(root.base, np.ndarray):
+        root = root.base
+    if array.dtype == object:
+        yield ("object", id(root)), int(pd.Series(array).memory_usage(index=False, deep=True))
+    else:
+        # Views share their root's identity, so a slice is never counted twice
+        yield ("numpy", id(root.base) if root.base is not None else id(root)), root.nbytes
+
+
+def frame_buffers(frame):
+    """{identity: nbytes} of every buffer a DataFrame or Series references."""
+    columns = frame.items() if isinstance(frame, pd.DataFrame) else [(frame.name, frame)]
+    found = {}
+    for _, col in columns:
+        found.update(_buffers(col.array))
+    return found
+
+
+def shared_buffers():
+    """Buffer identities held by the process-wide frame cache."""
+    shared = set()
+    for frame in frame_cache.frames():
+        shared.update(frame_buffers(frame))
+    return shared
+
+
+def deep_size(obj, shared, seen=None):
+    """Approximate bytes obj holds beyond the shared buffers (frames, containers, scalars)."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        owned = 0
+        for key, nbytes in frame_buffers(obj).items():
+            if key not in shared and key not in seen:
+                seen.add(key)
+                owned += nbytes
+        return owned
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(deep_size(k, shared, seen) + deep_size(v, shared, seen)
+                                        for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(deep_size(v, shared, seen) for v in obj)
+    return sys.getsizeof(obj)
+
+
+def _runtime():
+    from streamlit.runtime import Runtime
+
+    return Runtime.instance() if Runtime.exists() else None
+
+
+def _uploads(value):
+    """UploadedFiles held by one session_state value (a single or multiple file_uploader)."""
+    if isinstance(value, UploadedFile):
+        return [value]
+    if isinstance(value, list) and value and all(isinstance(v, UploadedFile) for v in value):
+        return value
+    return []
+
+
+def _media_internals_checked(version=None):
+    major, minor = (int(part) for part in (version or st.__version__).split(".")[:2])
+    return (major, minor) in MEDIA_INTERNALS_CHECKED
+
+
+def _media_bytes(runtime, session_id):
+    """Bytes of media shown only by this session (shared files are not charged); None if unknown."""
+    if not _media_internals_checked():
+        return None
+    mgr = runtime.media_file_mgr
+    by_session = getattr(mgr, "_files_by_session_and_coord", None)
+    files = getattr(getattr(mgr, "_storage", None), "_files_by_id", None)
+    lock = getattr(mgr, "_lock", None)
+    if by_session is None or files is None or lock is None:
+        return None
+    with lock:
+        mine = set(by_session.get(session_id, {}).values())
+        others = {fid for sid, coords in by_session.items() if sid != session_id for fid in coords.values()}
+    return sum(len(files[fid].content) for fid in mine - others if fid in files)
+
+
+class SessionMemory:
+    def __init__(self, budget=BUDGET_BYTES):
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._usage = {}    # session id -> Usage
+
+    def measure(self, session_id, page, state):
+        shared = shared_buffers()
+        state_bytes = uploads = media = 0
+        for value in dict(state).values():
+            files = _uploads(value)
+            if files:
+                uploads += sum(f.size for f in files)
+            else:
+                state_bytes += deep_size(value, shared)
+        runtime = _runtime()
+        if runtime is not None and session_id is not None:
+            media = _media_bytes(runtime, session_id)
+        total = state_bytes + uploads + (media or 0)
+        return Usage(session_id, page, state_bytes, uploads, media, total, time.time())
+
+    def account(self, session_id, page, state):
+        """Measure a session after its rerun, enforcing the budget; returns its Usage."""
+        with metrics.timer("session_memory"):
+            usage = self.measure(session_id, page, state)
+            if usage.total > self.budget:
+                dropped = [k for k in list(state.keys())
+                           if any(fnmatch.fnmatch(str(k), p) for p in DROPPABLE)]
+                for key in dropped:
+                    del state[key]
+                if dropped:
+                    usage = self.measure(session_id, page, state)
+                metrics.incr("session_over_budget")
+        if session_id is not None:
+            with self._lock:
+                self._usage[session_id] = usage
+        return usage
+
+    def usage(self, session_id):
+        with self._lock:
+            return self._usage.get(session_id)
+
+    def fits_upload(self, session_id, nbytes):
+        """True if the session stays within budget while its uploads total nbytes."""
+        usage = self.usage(session_id)
+        held = usage.total - usage.uploads if usage else 0
+        return held + nbytes <= self.budget
+
+    def _prune(self):
+        runtime = _runtime()
+        if runtime is None:
+            return
+        with self._lock:
+            for session_id in [s for s in self._usage if not runtime.is_active_session(s)]:
+                del self._usage[session_id]
+
+    def report(self):
+        """(per-session DataFrame, per-page DataFrame) of the latest measurements."""
+        self._prune()
+        with self._lock:
+            rows = list(self._usage.values())
+        sessions = pd.DataFrame(rows, columns=Usage._fields).drop(columns="ts")
+        sessions["session"] = sessions["session"].str[:8]
+        sessions = sessions.sort_values("total", ascending=False, ignore_index=True)
+        pages = (sessions.groupby("page", observed=True)
+                 .agg(sessions=("session", "size"), total=("total", "sum"), max=("total", "max"))
+                 .sort_values("total", ascending=False))
+        return sessions, pages
+
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_session_memory():
+    """The process-wide SessionMemory tracker."""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = SessionMemory()
+        return _tracker
@@ -0,0 +1,276 @@
+"""
+Site manifest and portfolio rollups.
+
+Each site the dashboard can show is described in sites.json (or the file
+named by DASHBOARD_SITES):
+
+    {"sites": [
+      {"key": "mockup", "name": "Mockup Site", "lat": 12.98975, "lon": 80.230093,
+       "data_dir": "data", "visuals_dir": "visuals",
+       "as_planned_url": "...", "drawing_url": "...",
+       "as_built_urls": {"06 Feb": "...", "08 Mar": "..."},
+       "cctv_url": "http://10.0.0.5/video.mjpg", "cctv_page_url": "http://10.0.0.5/"}
+    ]}
+
+Only key is required. name defaults to key, and data_dir and visuals_dir
+default to sites/<key>/data and sites/<key>/visuals. cctv_url is the camera's
+MJPEG stream or JPEG snapshot URL, relayed inline on Home (see cctv.py);
+without it Home links to cctv_page_url instead. Without a manifest the
+dashboard runs the single built-in site (DEFAULT_SITE) from data/ and
+visuals/, exactly as before.
+
+portfolio() summarizes every site's EVA and milestone workbooks. Workbooks
+missing from the shared frame cache are parsed in a process pool, since
+openpyxl holds the GIL and threads would parse serially. Workbooks with a
+fresh precomputed Arrow copy (precompute.py) are memory-mapped in-process
+instead. The frames go into the same cache entries the site pages read, so
+drilling into a site is instant. Per-site summaries are memoized on (file
+versions, status date). An unchanged portfolio costs one stat per workbook.
+
+Environment:
+  DASHBOARD_SITES               manifest path (default sites.json)
+  DASHBOARD_PORTFOLIO_WORKERS   parser processes (default min(8, CPUs))
+"""
+import json
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from cctv import DEFAULT_URL as DEFAULT_CCTV_URL
+from element_store import DEFAULT_PATH as DEFAULT_ELEMENTS_DB
+from eva_engine import BASE_COLUMNS, add_indices, eva_totals
+import columnar
+from frame_cache import excel_key, frame_cache, load_workbook
+
+MANIFEST_PATH = os.environ.get("DASHBOARD_SITES", "sites.json")
+WORKERS = int(os.environ.get("DASHBOARD_PORTFOLIO_WORKERS", min(8, os.cpu_count() or 1)))
+MAX_CACHED_SUMMARIES = 2048
+EVA_FILE = "EVA_Analysis.xlsx"
+MILESTONE_FILE = "Milestone.xlsx"
+
+Site = namedtuple("Site", ["key", "name", "lat", "lon", "data_dir", "visuals_dir", "elements_db",
+                           "as_planned_url", "drawing_url", "as_built_urls", "cctv_url", "cctv_page_url"])
+# sites: key -> Site in manifest order, version: manifest file stamp (None for the built-in site)
+Manifest = namedtuple("Manifest", ["sites", "version"])
+
+DEFAULT_SITE = Site(
+    key="mockup",
+    name="Mockup Site",
+    lat=12.989750,
+    lon=80.230093,
+    data_dir="data",
+    visuals_dir="visuals",
+    elements_db=DEFAULT_ELEMENTS_DB,
+    as_planned_url="https://app.speckle.systems/projects/a95c025094/models/7f6e8a8520?embed=true",
+    drawing_url="https://app.speckle.systems/projects/970c0e268f/models/65931bb453?embed=true",
+    as_built_urls={
+        "06 Feb": "https://app.speckle.systems/projects/3db7806786/models/8c40f67a94?embed=true",
+        "08 Mar": "https://app.speckle.systems/projects/3db7806786/models/4b57f57c40?embed=true",
+        "17 Mar": "https://app.speckle.systems/projects/3db7806786/models/78d9e95751?embed=true",
+    },
+    cctv_url=DEFAULT_CCTV_URL,
+    cctv_page_url="http://10.21.56.110/",
+)
+
+
+def site_from_dict(entry):
+    key = str(entry["key"])
+    data_dir = Path(entry.get("data_dir", f"sites/{key}/data")).as_posix()
+    return Site(
+        key=key,
+        name=entry.get("name", key),
+        lat=entry.get("lat"),
+        lon=entry.get("lon"),
+        data_dir=data_dir,
+        visuals_dir=Path(entry.get("visuals_dir", f"sites/{key}/visuals")).as_posix(),
+        elements_db=entry.get("elements_db", f"{data_dir}/elements.sqlite"),
+        as_planned_url=entry.get("as_planned_url"),
+        drawing_url=entry.get("drawing_url"),
+        as_built_urls=dict(entry.get("as_built_urls", {})),
+        cctv_url=entry.get("cctv_url"),
+        cctv_page_url=entry.get("cctv_page_url"),
+    )
+
+
+_manifest = Manifest(OrderedDict([(DEFAULT_SITE.key, DEFAULT_SITE)]), None)
+_manifest_lock = threading.Lock()
+
+
+def load_manifest(path=MANIFEST_PATH):
+    """Sites from the manifest, re-read only when the file changes."""
+    global _manifest
+    path = Path(path)
+    try:
+        stat = path.stat()
+        version = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        version = None
+    with _manifest_lock:
+        if version != _manifest.version:
+            if version is None:
+                sites = [DEFAULT_SITE]
+            else:
+                sites = [site_from_dict(entry) for entry in json.loads(path.read_text())["sites"]]
+            _manifest = Manifest(OrderedDict((s.key, s) for s in sites), version)
+        return _manifest
+
+
+SUMMARY_COLUMNS = BASE_COLUMNS + ["Percent Complete", "Activities", "Milestones", "Completed", "Overdue", "Error"]
+MILESTONE_KWARGS = {"parse_dates": ["Planned Date", "Actual Date"]}
+
+
+def site_files(site):
+    """(path, read_excel kwargs) of the site's EVA and milestone workbooks."""
+    data_dir = Path(site.data_dir)
+    return [(data_dir / EVA_FILE, {}), (data_dir / MILESTONE_FILE, MILESTONE_KWARGS)]
+
+
+def _key(path, kwargs):
+    try:
+        return excel_key(path, **kwargs)
+    except FileNotFoundError:
+        return None
+
+
+def summarize_site(eva_raw, ms, status_date):
+    """One site's EVA totals and milestone counts; either frame may be None."""
+    row = {}
+    try:
+        if eva_raw is not None:
+            # Totals only; SPI/CPI etc. are derived once for the whole portfolio frame
+            row.update(eva_totals(eva_raw, status_date))
+            row["Percent Complete"] = row["BCWP"] / row["BAC"] if row["BAC"] else np.nan
+            row["Activities"] = len(eva_raw)
+        if ms is not None:
+            done = ms["Actual Date"].notna().to_numpy()
+            row["Milestones"] = len(ms)
+            row["Completed"] = int(done.sum())
+            row["Overdue"] = int((~done & (ms["Planned Date"] < pd.Timestamp(status_date)).to_numpy()).sum())
+    except Exception as exc:
+        row["Error"] = f"{exc.__class__.__name__}: {exc}"
+    return row
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Process-wide parser pool (threads where processes are unavailable)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            try:
+                # spawn: never fork the multi-threaded server process
+                _pool = ProcessPoolExecutor(WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            except (OSError, NotImplementedError):
+                _pool = ThreadPoolExecutor(WORKERS, thread_name_prefix="portfolio")
+        return _pool
+
+
+def _reset_pool(broken):
+    # A worker died (e.g. out of memory); the next call starts a fresh pool
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+
+
+def parse_missing(sites, pool=None, on_progress=None):
+    """
+    Parse every workbook of sites that is not in the frame cache yet, in the
+    pool, and store the results in the cache. Returns {cache key: error}.
+    """
+    jobs = {}
+    for site in sites:
+        for path, kwargs in site_files(site):
+            key = _key(path, kwargs)
+            if key is None or key in frame_cache or key in jobs:
+                continue
+            if columnar.fresh(path):
+                # Precomputed: memory-mapping here beats shipping a parsed frame back from a worker
+                frame_cache.get_or_load(key, lambda: load_workbook(path, **kwargs))
+                continue
+            jobs[key] = (key[1], kwargs)  # resolved path: workers keep the cwd they started in
+    errors = {}
+    if not jobs:
+        return errors
+    pool = pool or get_pool()
+    with metrics.timer("portfolio_parse"):
+        futures = {pool.submit(load_workbook, path, **kwargs): key for key, (path, kwargs) in jobs.items()}
+        for done, future in enumerate(as_completed(futures), 1):
+            key = futures[future]
+            try:
+                frame = future.result()
+                frame_cache.get_or_load(key, lambda: frame)
+            except Exception as exc:
+                errors[key] = f"{exc.__class__.__name__}: {exc}"
+                if isinstance(exc, BrokenProcessPool):
+                    _reset_pool(pool)
+            if on_progress:
+                on_progress(done, len(jobs))
+    return errors
+
+
+_summaries = OrderedDict()   # (EVA key, milestone key, status date) -> summary dict
+_summaries_lock = threading.Lock()
+
+
+def portfolio(sites, status_date, pool=None, on_progress=None):
+    """
+    DataFrame with one row per site (index: site key) of EVA totals, SPI/CPI
+    and milestone counts, plus a dict of load stats.
+
+    Workbooks are parsed in the pool only when the frame cache does not hold
+    them yet (drill-down pages then hit the same entries); summaries are
+    recomputed from cached frames, so changing the status date re-parses nothing.
+    """
+    status_date = str(status_date)
+    keys = {site.key: tuple(_key(path, kwargs) for path, kwargs in site_files(site)) for site in sites}
+    with _summaries_lock:
+        rows = {k: _summaries[fk + (status_date,)] for k, fk in keys.items() if fk + (status_date,) in _summaries}
+    todo = [site for site in sites if site.key not in rows]
+    errors = parse_missing(todo, pool, on_progress)
+    for site in todo:
+        frames = []
+        for (path, kwargs), key in zip(site_files(site), keys[site.key]):
+            if key is None or key in errors:
+                frames.append(None)
+            else:
+                frames.append(frame_cache.get_or_load(key, lambda: load_workbook(path, **kwargs)))
+        row = summarize_site(*frames, status_date)
+        failed = [errors[k] for k in keys[site.key] if k in errors]
+        if failed:
+            row["Error"] = "; ".join(failed)
+        else:
+            with _summaries_lock:
+                _summaries[keys[site.key] + (status_date,)] = row
+                while len(_summaries) > MAX_CACHED_SUMMARIES:
+                    _summaries.popitem(last=False)
+        rows[site.key] = row
+    metrics.incr("portfolio_sites", len(rows))
+
+    frame = pd.DataFrame.from_dict(rows, orient="index").reindex(
+        index=[s.key for s in sites], columns=SUMMARY_COLUMNS)
+    frame[BASE_COLUMNS] = frame[BASE_COLUMNS].astype("float64")
+    add_indices(frame)
+    return frame, {"sites": len(rows), "computed": len(todo), "cached": len(rows) - len(todo)}
+
+
+def portfolio_totals(frame):
+    """Portfolio-wide cost totals, cost-weighted SPI/CPI and milestone counts."""
+    totals = pd.DataFrame([frame[BASE_COLUMNS].sum()])
+    add_indices(totals)
+    out = totals.iloc[0].to_dict()
+    for col in ("Milestones", "Completed", "Overdue"):
+        out[col] = int(np.nansum(frame[col].to_numpy("float64")))
+    out["Sites with errors"] = int(frame["Error"].notna().sum())
+    return out
@@ -0,0 +1,236 @@
+"""
+Catalog of progress snapshots.
+
+Instead of hardcoding one dict entry per scan date, the catalog indexes
+data/progress_<date>.xlsx and matches each file with its visuals:
+
+  visuals/progress_<date>.gif        progress GIF
+  visuals/<date>[._- ]*.png|jpg|jpeg site photo (the date, then a separator or the extension)
+
+<date> is a day and month like 06feb (optionally with a year, 06feb2025) or an
+ISO date (2025-02-06). A date without a year is placed in the latest year that
+does not postdate the workbook's mtime, so 29feb parses and year-less scans
+sort among dated ones. Files whose name is not a date, or is a second
+spelling of a date already taken (2025-02-06 next to 06feb2025), are listed by
+skipped() with the reason rather than dropped silently. refresh() only
+rescans the two directories; workbooks are parsed lazily, kept compact
+(category text, downcast ints) in the shared frame cache, and re-read only
+when their mtime or size changes, so picking up a new weekly scan costs one
+directory listing.
+
+diff(a, b) compares two snapshots with a single merge: elements added and
+removed, numeric quantities changed and the shift in any % complete column.
+"""
+import datetime
+import re
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from frame_cache import read_excel_cached
+
+DATE_FORMATS = [("%d%b%Y", True), ("%Y-%m-%d", True), ("%Y%m%d", True), ("%d%b", False)]
+LEAP_YEAR = 2000   # year-less tokens are parsed in a leap year so 29feb is valid
+PHOTO_SUFFIXES = {".png", ".jpg", ".jpeg"}
+PERCENT_PATTERN = re.compile(r"%|percent|complete|progress", re.IGNORECASE)
+REFRESH_INTERVAL = 5.0  # seconds between directory rescans
+MAX_CACHED_DIFFS = 32
+
+# key: display label ("06 Feb"), date: datetime.date (year inferred from the mtime when the file has none)
+Snapshot = namedtuple("Snapshot", ["key", "date", "path", "gif", "photo", "stamp"])
+SnapshotDiff = namedtuple("SnapshotDiff", ["id_column", "added", "removed", "changed", "summary"])
+
+
+def parse_snapshot_date(token, modified=None):
+    """
+    Return (date, label) for a filename date token, or None if it is not a date.
+    A token without a year gets the latest year whose date is not after
+    `modified` (a datetime.date), or LEAP_YEAR without one.
+    """
+    for fmt, has_year in DATE_FORMATS:
+        try:
+            if has_year:
+                date = datetime.datetime.strptime(token, fmt).date()
+            else:
+                date = datetime.datetime.strptime(f"{token} {LEAP_YEAR}", f"{fmt} %Y").date()
+        except ValueError:
+            continue
+        label = date.strftime("%d %b %Y" if has_year else "%d %b")
+        if not has_year and modified is not None:
+            date = _latest_year(date, modified)
+        return date, label
+    return None
+
+
+def _latest_year(date, modified):
+    for year in range(modified.year, modified.year - 8, -1):
+        try:
+            candidate = date.replace(year=year)
+        except ValueError:   # 29 Feb outside a leap year
+            continue
+        if candidate <= modified:
+            return candidate
+    return date
+
+
+class SnapshotCatalog:
+    def __init__(self, data_dir="data", visuals_dir="visuals"):
+        self.data_dir = Path(data_dir)
+        self.visuals_dir = Path(visuals_dir)
+        self._lock = threading.Lock()
+        self._snapshots = {}          # key -> Snapshot, in date order
+        self._skipped = {}            # progress_*.xlsx name -> why it is not in the catalog
+        self._last_scan = 0.0
+        self._diffs = OrderedDict()   # (stamp_a, stamp_b) -> SnapshotDiff
+
+    def refresh(self, force=False):
+        """Rescan data/ and visuals/ (throttled); returns True if the index changed."""
+        with self._lock:
+            if not force and time.monotonic() - self._last_scan < REFRESH_INTERVAL:
+                return False
+            self._last_scan = time.monotonic()
+            visuals = {p.name.lower(): p for p in self.visuals_dir.iterdir()} if self.visuals_dir.is_dir() else {}
+            photos = sorted((name, p) for name, p in visuals.items() if p.suffix.lower() in PHOTO_SUFFIXES)
+            found, skipped = {}, {}
+            for path in sorted(self.data_dir.glob("progress_*.xlsx")):
+                token = path.stem[len("progress_"):].lower()
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:   # removed while scanning
+                    continue
+                parsed = parse_snapshot_date(token, datetime.date.fromtimestamp(stat.st_mtime))
+                if parsed is None:
+                    skipped[path.name] = "no recognizable date"
+                    continue
+                date, key = parsed
+                if key in found:
+                    skipped[path.name] = f"same date as {found[key].path.name}"
+                    continue
+                # Entries are cheap to rebuild; the parsed frame is cached per stamp
+                stamp = (str(path), stat.st_mtime_ns, stat.st_size)
+                gif = visuals.get(f"progress_{token}.gif")
+                # "06feb" must not pick up 06feb2025_site.jpg
+                photo = next((p for name, p in photos if re.match(rf"{re.escape(token)}[._\- ]", name)), None)
+                found[key] = Snapshot(key, date, path, gif and str(gif), photo and str(photo), stamp)
+            changed = found != self._snapshots
+            self._snapshots = dict(sorted(found.items(), key=lambda item: item[1].date))
+            self._skipped = dict(sorted(skipped.items()))
+            return changed
+
+    def keys(self):
+        self.refresh()
+        return list(self._snapshots)
+
+    def invalidate(self, changed=None):
+        """Rescan now; registered as a change-feed hook for the catalog's folders."""
+        self.refresh(force=True)
+
+    def skipped(self):
+        """{file name: reason} for progress_*.xlsx files left out of the catalog."""
+        self.refresh()
+        return dict(self._skipped)
+
+    def get(self, key):
+        """Snapshot for key, or None if its file is gone."""
+        self.refresh()
+        return self._snapshots.get(key)
+
+    def frame(self, key):
+        """Compact, read-only frame for one snapshot (parsed once per file version)."""
+        snap = self.get(key)
+        if snap is None:
+            raise KeyError(key)
+        return read_excel_cached(snap.path)
+
+    def diff(self, key_a, key_b):
+        """Vectorized delta from snapshot key_a to key_b (cached per file versions); KeyError if one is gone."""
+        snap_a, snap_b = self.get(key_a), self.get(key_b)
+        for key, snap in ((key_a, snap_a), (key_b, snap_b)):
+            if snap is None:
+                raise KeyError(key)
+        cache_key = (snap_a.stamp, snap_b.stamp)
+        with self._lock:
+            if cache_key in self._diffs:
+                self._diffs.move_to_end(cache_key)
+                return self._diffs[cache_key]
+        result = diff_frames(self.frame(key_a), self.frame(key_b))
+        with self._lock:
+            self._diffs[cache_key] = result
+            while len(self._diffs) > MAX_CACHED_DIFFS:
+                self._diffs.popitem(last=False)
+        return result
+
+
+def id_column(a, b):
+    """First shared column that uniquely identifies rows in both frames (ID-like names first)."""
+    common = [c for c in a.columns if c in b.columns]
+    ranked = sorted(common, key=lambda c: not re.search(r"\bid\b|element|code|name", str(c), re.IGNORECASE))
+    for col in ranked:
+        if a[col].notna().all() and b[col].notna().all() and a[col].is_unique and b[col].is_unique:
+            return col
+    return None
+
+
+def diff_frames(a, b):
+    key = id_column(a, b)
+    if key is None:
+        # No usable ID: compare row by row position
+        key = "Row"
+        a = a.assign(Row=np.arange(len(a)))
+        b = b.assign(Row=np.arange(len(b)))
+    a = a.assign(**{key: a[key].astype(str)})
+    b = b.assign(**{key: b[key].astype(str)})
+
+    merged = a.merge(b, on=key, how="outer", suffixes=(" (A)", " (B)"), indicator=True)
+    side = merged["_merge"].to_numpy()
+    added = merged.loc[side == "right_only", [key]].reset_index(drop=True)
+    removed = merged.loc[side == "left_only", [key]].reset_index(drop=True)
+
+    both = merged[side == "both"]
+    numeric = [c for c in a.columns if c != key and c in b.columns
+               and pd.api.types.is_numeric_dtype(a[c]) and pd.api.types.is_numeric_dtype(b[c])]
+    deltas = {}
+    changed_mask = np.zeros(len(both), dtype=bool)
+    for col in numeric:
+        before = both[f"{col} (A)"].to_numpy("float64")
+        after = both[f"{col} (B)"].to_numpy("float64")
+        delta = after - before
+        deltas[col] = (before, after, delta)
+        changed_mask |= ~np.isclose(before, after, equal_nan=True)
+
+    changed = pd.DataFrame({key: both[key].to_numpy()})
+    for col, (before, after, delta) in deltas.items():
+        changed[f"{col} (A)"] = before
+        changed[f"{col} (B)"] = after
+        changed[f"Δ {col}"] = delta
+    changed = changed[changed_mask].reset_index(drop=True)
+
+    summary = {
+        "added": len(added),
+        "removed": len(removed),
+        "changed": len(changed),
+        "unchanged": int(len(both) - changed_mask.sum()),
+    }
+    for col, (_, _, delta) in deltas.items():
+        if PERCENT_PATTERN.search(str(col)):
+            summary[f"mean Δ {col}"] = float(np.nanmean(delta)) if len(delta) else 0.0
+        else:
+            summary[f"total Δ {col}"] = float(np.nansum(delta))
+    return SnapshotDiff(key, added, removed, changed, summary)
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(data_dir="data", visuals_dir="visuals"):
+    """Process-wide catalog for a data/visuals directory pair."""
+    with _catalogs_lock:
+        key = (str(Path(data_dir).resolve()), str(Path(visuals_dir).resolve()))
+        if key not in _catalogs:
+            _catalogs[key] = SnapshotCatalog(data_dir, visuals_dir)
+        return _catalogs[key]
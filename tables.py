@@ -0,0 +1,104 @@
+"""
+Paged table component.
+
+st.dataframe(df) serializes the whole frame (and a Styler the whole styled
+HTML) on every rerun. paged_table keeps the frame on the server, pushes
+search, column filters and sorting down into pandas, and only sends one page
+of rows to the browser. Threshold highlighting is computed as a vectorized
+mask over that page, so render cost follows the page size, not the dataset.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import metrics
+
+PAGE_SIZES = [25, 50, 100, 250]
+GOOD = "background-color:#c6efce"
+BAD = "background-color:#ffc7ce"
+FILTER_MAX_VALUES = 50  # columns with more distinct values get no filter widget
+
+
+def _text_columns(df):
+    return [c for c in df.columns
+            if pd.api.types.is_object_dtype(df[c]) or pd.api.types.is_string_dtype(df[c])
+            or isinstance(df[c].dtype, pd.CategoricalDtype)]
+
+
+def search_mask(df, query, columns):
+    """Rows where any of `columns` contains `query` (case-insensitive, literal)."""
+    mask = np.zeros(len(df), dtype=bool)
+    for col in columns:
+        mask |= df[col].astype("string").str.contains(query, case=False, regex=False, na=False).to_numpy()
+    return mask
+
+
+def threshold_styles(window, columns, threshold):
+    """CSS per cell: GOOD where value >= threshold, BAD below, nothing for NaN."""
+    styles = pd.DataFrame("", index=window.index, columns=window.columns)
+    for col in columns:
+        values = window[col].to_numpy("float64")
+        styles[col] = np.where(np.isnan(values), "", np.where(values >= threshold, GOOD, BAD))
+    return styles
+
+
+def paged_table(df, key, page_size=50, highlight=None, threshold=1.0):
+    """
+    Render df one page at a time with search, filter and sort controls.
+
+    key        unique widget key prefix for this table
+    highlight  columns to colour against threshold (e.g. ["SPI", "CPI"])
+    Returns the page of rows that was rendered.
+    """
+    if not isinstance(df.index, pd.RangeIndex):
+        df = df.reset_index()
+    total = len(df)
+    text_cols = _text_columns(df)
+
+    c_search, c_sort, c_order, c_size = st.columns([3, 2, 1, 1])
+    query = c_search.text_input("Search", key=f"{key}-search", placeholder="Search text columns")
+    sort_col = c_sort.selectbox("Sort by", ["(none)"] + list(df.columns), key=f"{key}-sort")
+    descending = c_order.toggle("Desc", key=f"{key}-desc")
+    page_size = c_size.selectbox("Rows", PAGE_SIZES,
+                                 index=PAGE_SIZES.index(page_size) if page_size in PAGE_SIZES else 1,
+                                 key=f"{key}-size")
+
+    view = df
+    filterable = [c for c in text_cols if df[c].nunique(dropna=True) <= FILTER_MAX_VALUES]
+    if filterable:
+        with st.expander("Filters"):
+            for col in filterable:
+                picked = st.multiselect(col, sorted(df[col].dropna().astype(str).unique()),
+                                        key=f"{key}-filter-{col}")
+                if picked:
+                    view = view[view[col].astype(str).isin(picked).to_numpy()]
+    if query:
+        view = view[search_mask(view, query, text_cols)]
+    if sort_col != "(none)":
+        view = view.sort_values(sort_col, ascending=not descending, kind="stable", na_position="last")
+
+    n_rows = len(view)
+    n_pages = max(math.ceil(n_rows / page_size), 1)
+    page = 1
+    if n_pages > 1:
+        page = st.number_input(f"Page (of {n_pages:,})", 1, n_pages, 1, key=f"{key}-page")
+    start = (min(page, n_pages) - 1) * page_size
+    window = view.iloc[start:start + page_size]
+    # A categorical column would ship its whole category list with every page
+    categorical = [c for c in window.columns if isinstance(window[c].dtype, pd.CategoricalDtype)]
+    if categorical:
+        window = window.assign(**{c: window[c].cat.remove_unused_categories() for c in categorical})
+
+    shown = window
+    if highlight:
+        cols = [c for c in highlight if c in window.columns]
+        shown = window.style.apply(lambda w: threshold_styles(w, cols, threshold), axis=None)
+    with metrics.timer("table_render"):
+        st.dataframe(shown, use_container_width=True, hide_index=True)
+    metrics.incr("rows_rendered", len(window))
+
+    scope = f" (filtered from {total:,})" if n_rows != total else ""
+    st.caption(f"Rows {start + 1 if n_rows else 0:,}–{start + len(window):,} of {n_rows:,}{scope}")
+    return window
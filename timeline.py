@@ -0,0 +1,182 @@
+"""
+Windowed timeline engine for the Milestone Tracker Gantt chart.
+
+The Gantt used to embed every milestone row in the Altair spec. A Timeline
+keeps the bars in a sorted interval index instead (start-sorted int64 arrays
+plus a running max of end times), so the bars overlapping a date window are
+found with two binary searches and a mask over the candidates only.
+
+When a window holds more bars than fit on screen, children are collapsed into
+one summary bar per WBS group (or per planned month when there is no WBS
+column). Built Vega-Lite specs are cached per data version and window, so
+panning back and forth does not rebuild them.
+
+Bars run from Planned Date to Actual Date, or to today while not completed.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from eva_engine import wbs_prefix
+
+MAX_BARS = 60           # collapse to group summaries above this many bars
+MAX_CACHED_SPECS = 64
+MAX_CACHED_TIMELINES = 8
+
+COMPLETED_COLOR = "#264653"   # dark teal
+PENDING_COLOR = "#E76F51"     # reddy orange
+
+
+class Timeline:
+    def __init__(self, ms_df, today=None, label_col="Activities", group_col="WBS"):
+        today = pd.Timestamp.today().normalize() if today is None else pd.Timestamp(today)
+        planned = pd.to_datetime(ms_df["Planned Date"], errors="coerce")
+        actual = pd.to_datetime(ms_df["Actual Date"], errors="coerce")
+        end = actual.fillna(today)
+        valid = planned.notna().to_numpy()
+
+        bars = pd.DataFrame({
+            "Activities": ms_df[label_col].astype(str).to_numpy()[valid],
+            "Planned Date": planned.to_numpy()[valid],
+            "Actual Date": actual.to_numpy()[valid],
+            "End": end.to_numpy()[valid],
+            "Row": np.flatnonzero(valid),   # position in the source sheet, for ordering
+        })
+        if group_col in ms_df.columns:
+            bars["Group"] = ms_df[group_col].astype(str).to_numpy()[valid]
+            self.group_levels = max((g.count(".") + 1 for g in bars["Group"].unique()), default=1)
+        else:
+            bars["Group"] = bars["Planned Date"].dt.strftime("%Y-%m")
+            self.group_levels = 0
+
+        # Interval index: sort by start; running max of end lets us skip
+        # every bar that finished before the window opens
+        start_ns = np.minimum(bars["Planned Date"].to_numpy("datetime64[ns]"), bars["End"].to_numpy("datetime64[ns]")).astype(np.int64)
+        end_ns = np.maximum(bars["Planned Date"].to_numpy("datetime64[ns]"), bars["End"].to_numpy("datetime64[ns]")).astype(np.int64)
+        order = np.argsort(start_ns, kind="stable")
+        self.bars = bars.iloc[order].reset_index(drop=True)
+        self._start = start_ns[order]
+        self._end = end_ns[order]
+        self._max_end = np.maximum.accumulate(self._end) if len(order) else self._end
+        self.min_date = pd.Timestamp(self._start.min()) if len(order) else today
+        self.max_date = pd.Timestamp(self._end.max()) if len(order) else today
+        self._specs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.bars)
+
+    def window_positions(self, start, end):
+        """Positions (in start order) of bars that overlap [start, end]."""
+        lo_ns, hi_ns = pd.Timestamp(start).value, pd.Timestamp(end).value
+        lo = np.searchsorted(self._max_end, lo_ns, side="left")
+        hi = np.searchsorted(self._start, hi_ns, side="right")
+        if hi <= lo:
+            return np.empty(0, dtype=np.int64)
+        candidates = np.arange(lo, hi)
+        return candidates[self._end[lo:hi] >= lo_ns]
+
+    def window(self, start, end, row_offset=0, row_limit=MAX_BARS, group_level=None):
+        """
+        Rows to draw for a date window, plus the total before row slicing.
+
+        Bars keep their source-sheet order. If more than row_limit bars
+        overlap and group_level is not given, the most detailed WBS level
+        that fits is picked automatically; group_level=0 forces individual
+        bars.
+        """
+        visible = self.bars.iloc[self.window_positions(start, end)].sort_values("Row")
+        if group_level is None:
+            group_level = 0 if len(visible) <= row_limit else self._fitting_level(visible, row_limit)
+        if group_level:
+            visible = self._summarize(visible, group_level)
+        total = len(visible)
+        return visible.iloc[row_offset:row_offset + row_limit], total
+
+    def _fitting_level(self, visible, row_limit):
+        # Deepest WBS level whose groups still fit; level 1 if none does
+        for level in range(self.group_levels, 1, -1):
+            if wbs_prefix(visible["Group"], level).nunique() <= row_limit:
+                return level
+        return 1
+
+    def _summarize(self, visible, level):
+        groups = wbs_prefix(visible["Group"], level) if self.group_levels else visible["Group"]
+        summary = visible.groupby(groups.to_numpy(), sort=False).agg(**{
+            "Planned Date": ("Planned Date", "min"),
+            "End": ("End", "max"),
+            "Count": ("Row", "size"),
+            "Done": ("Actual Date", "count"),
+            "Row": ("Row", "min"),
+        })
+        # A summary bar only counts as completed when all of its children are
+        summary["Actual Date"] = summary["End"].where(summary["Done"] == summary["Count"])
+        summary["Activities"] = [f"{g} ({n} activities)" for g, n in zip(summary.index, summary["Count"])]
+        return summary.reset_index(drop=True)
+
+    def spec(self, version, start, end, row_offset=0, row_limit=MAX_BARS, group_level=None):
+        """Vega-Lite spec for a window, cached per (data version, window, rows, grouping)."""
+        key = (version, str(start), str(end), row_offset, row_limit, group_level)
+        with self._lock:
+            if key in self._specs:
+                self._specs.move_to_end(key)
+                return self._specs[key]
+        rows, total = self.window(start, end, row_offset, row_limit, group_level)
+        spec = (build_gantt(rows, start, end), len(rows), total)
+        with self._lock:
+            self._specs[key] = spec
+            while len(self._specs) > MAX_CACHED_SPECS:
+                self._specs.popitem(last=False)
+        return spec
+
+
+def build_gantt(rows, start, end):
+    import altair as alt  # Only needed once a spec is actually built
+
+    data = rows[["Activities", "Planned Date", "Actual Date", "End"]]
+    gantt = (
+        alt.Chart(data)
+           .mark_bar(cornerRadiusTopLeft=3, cornerRadiusBottomLeft=3)
+           .encode(
+               y=alt.Y("Activities:N", sort=data["Activities"].tolist(),
+                       title=None, axis=alt.Axis(labelFontSize=12)),
+               x=alt.X("Planned Date:T", title="Date",
+                       scale=alt.Scale(domain=[pd.Timestamp(start).isoformat(), pd.Timestamp(end).isoformat()])),
+               x2="End:T",
+               color=alt.condition(
+                   "datum['Actual Date'] != null",
+                   alt.value(COMPLETED_COLOR),
+                   alt.value(PENDING_COLOR)
+               ),
+               tooltip=[
+                   "Activities",
+                   alt.Tooltip("Planned Date", title="Planned"),
+                   alt.Tooltip("Actual Date",  title="Actual")
+               ]
+           )
+           .properties(height=max(350, 22 * len(data)))
+           .configure_axis(grid=False)
+    )
+    return gantt.to_dict()
+
+
+_timelines = OrderedDict()
+_timelines_lock = threading.Lock()
+
+
+def get_timeline(version, ms_df, today=None):
+    """Process-wide Timeline per data version (e.g. the milestone file's source_key)."""
+    key = (version, str(today))
+    with _timelines_lock:
+        timeline = _timelines.get(key)
+        if timeline is not None:
+            _timelines.move_to_end(key)
+            return timeline
+    timeline = Timeline(ms_df, today)
+    with _timelines_lock:
+        _timelines[key] = timeline
+        while len(_timelines) > MAX_CACHED_TIMELINES:
+            _timelines.popitem(last=False)
+    return timeline
@@ -0,0 +1,245 @@
+"""
+Process-wide change feed: file watching, cache invalidation and push reruns.
+
+One daemon thread per server process polls data/ and visuals/ (a stat per
+file, no parsing) every few seconds. When files are added, modified or
+removed it:
+
+  1. drops frame-cache entries parsed from those files (their memory is freed
+     now instead of waiting for LRU eviction);
+  2. runs the invalidation hooks registered with on_change() for matching
+     patterns (e.g. rescanning the snapshot catalog);
+  3. bumps the revision of every page that depends on one of the changed
+     paths, and asks Streamlit to rerun only the sessions on those pages.
+
+Streamlit has no public API for rerunning another session, so step 3 reaches
+into the runtime's session manager. can_push() reports whether that works on
+the running Streamlit. Where it does not, pages fall back to polling
+revision(page) from a short st.fragment(run_every=...) and rerunning
+themselves when it moves.
+
+Sessions report their page on every rerun through register(). Pages declare
+what they read with depends(): glob patterns relative to the working directory
+("data/progress_*.xlsx") or named topics ("weather"). A named topic is
+published by a poller. The poller only runs while some session is on a page
+that depends on the topic, and a new value from it counts as a change. So an
+idle kiosk costs one directory listing per interval and no script reruns.
+
+Environment:
+  DASHBOARD_WATCH_INTERVAL   seconds between polls (default 2)
+"""
+import fnmatch
+import os
+import threading
+import time
+
+import metrics
+from frame_cache import frame_cache
+
+WATCH_INTERVAL = float(os.environ.get("DASHBOARD_WATCH_INTERVAL", "2"))
+WATCH_ROOTS = ("data", "visuals")
+_UNSET = object()  # a poller's value before its first call
+
+
+def scan(roots):
+    """{relative posix path: (mtime_ns, size)} for every file under roots."""
+    found = {}
+    stack = [root for root in roots if os.path.isdir(root)]
+    while stack:
+        folder = stack.pop()
+        try:
+            entries = list(os.scandir(folder))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    found[entry.path.replace(os.sep, "/")] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                continue
+    return found
+
+
+def _runtime():
+    from streamlit.runtime import Runtime
+
+    return Runtime.instance() if Runtime.exists() else None
+
+
+def _active_session_info():
+    """The runtime's get_active_session_info (private API), or None where it is missing."""
+    runtime = _runtime()
+    return getattr(getattr(runtime, "_session_mgr", None), "get_active_session_info", None)
+
+
+def can_push():
+    """True if sessions can be rerun from the change feed on this Streamlit."""
+    return _active_session_info() is not None
+
+
+def _rerun_session(session_id):
+    """
+    Ask the Streamlit runtime to rerun one session: True if requested, False
+    if the session is gone, None if this Streamlit offers no way to do it.
+    """
+    get_info = _active_session_info()
+    if get_info is None:
+        return None
+    try:
+        info = get_info(session_id)
+        if info is None:
+            return False
+        info.session.request_rerun(None)
+    except AttributeError:
+        return None
+    return True
+
+
+class ChangeFeed:
+    def __init__(self, roots=WATCH_ROOTS, interval=WATCH_INTERVAL):
+        self.roots = tuple(roots)
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pages = {}       # page -> tuple of patterns/topics
+        self._hooks = {}       # pattern -> [callback(changed paths), ...]
+        self._revisions = {}   # page -> number of changes published for it
+        self._pollers = {}     # topic -> (fn, last value)
+        self._sessions = {}    # session id -> page
+        self._files = None
+        self._thread = None
+        self.events = 0
+
+    def watch(self, *roots):
+        """Add folders to poll; files already in them do not count as changes."""
+        new = tuple(r for r in roots if r not in self.roots)
+        if new:
+            files = scan(new)
+            with self._lock:
+                self.roots += new
+                self._files = {**(self._files or {}), **files}
+
+    def depends(self, page, *patterns):
+        with self._lock:
+            self._pages[page] = patterns
+
+    def on_change(self, pattern, callback):
+        """Run callback(changed) when files matching pattern change; an equal callback is added once."""
+        with self._lock:
+            callbacks = self._hooks.setdefault(pattern, [])
+            if callback not in callbacks:
+                callbacks.append(callback)
+
+    def revision(self, page):
+        """Changes published so far for page; a session polls this when push reruns are unavailable."""
+        with self._lock:
+            return self._revisions.get(page, 0)
+
+    def add_poller(self, topic, fn):
+        with self._lock:
+            if topic not in self._pollers:
+                self._pollers[topic] = (fn, _UNSET)
+
+    def register(self, session_id, page):
+        if session_id is None:
+            return
+        with self._lock:
+            self._sessions[session_id] = page
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._files = scan(self.roots)
+                self._thread = threading.Thread(target=self._run, name="change-feed", daemon=True)
+                self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.tick()
+            except Exception:
+                metrics.incr("watch_errors")
+
+    def _watched(self, topic):
+        """True if some registered session's page depends on topic."""
+        return any(topic in self._pages.get(page, ()) for page in self._sessions.values())
+
+    def _prune(self):
+        """Forget sessions whose browser tab has gone."""
+        runtime = _runtime()
+        if runtime is None:
+            return
+        with self._lock:
+            for session_id in [s for s in self._sessions if not runtime.is_active_session(s)]:
+                del self._sessions[session_id]
+
+    def tick(self):
+        """One poll: diff the file index, run due pollers, publish what changed."""
+        self._prune()
+        files = scan(self.roots)
+        with self._lock:
+            previous, self._files = self._files or {}, files
+        changed = {p for p in files.keys() | previous.keys() if files.get(p) != previous.get(p)}
+        with self._lock:
+            pollers = [(topic, fn, last) for topic, (fn, last) in self._pollers.items() if self._watched(topic)]
+        for topic, fn, last in pollers:
+            try:
+                value = fn()
+            except Exception:
+                # A failing poller must not lose the file changes this tick already found
+                metrics.incr("watch_errors")
+                continue
+            if value is not last:
+                with self._lock:
+                    self._pollers[topic] = (fn, value)
+                if last is not _UNSET:
+                    changed.add(topic)
+        if changed:
+            self.publish(changed)
+
+    def publish(self, changed):
+        """Invalidate caches for, and rerun the sessions that depend on, changed paths/topics."""
+        changed = set(changed)
+        self.events += 1
+        metrics.incr("watch_changes", len(changed))
+        resolved = {os.path.realpath(p) for p in changed if "/" in p}
+        frame_cache.invalidate(lambda key: key[0] == "file" and key[1] in resolved)
+        with self._lock:
+            hooks = [cb for pattern, callbacks in self._hooks.items()
+                     if any(fnmatch.fnmatch(p, pattern) for p in changed) for cb in callbacks]
+            affected = {page for page, patterns in self._pages.items()
+                        if any(fnmatch.fnmatch(p, pattern) for p in changed for pattern in patterns)}
+            for page in affected:
+                self._revisions[page] = self._revisions.get(page, 0) + 1
+            targets = [sid for sid, page in self._sessions.items() if page in affected]
+        for callback in hooks:
+            callback(changed)
+        for session_id in targets:
+            pushed = _rerun_session(session_id)
+            if pushed:
+                metrics.incr("push_reruns")
+            elif pushed is False:
+                with self._lock:
+                    self._sessions.pop(session_id, None)
+        return targets
+
+    def stats(self):
+        with self._lock:
+            return {"files": len(self._files or ()), "sessions": len(self._sessions), "events": self.events}
+
+
+_feed = None
+_feed_lock = threading.Lock()
+
+
+def get_change_feed():
+    """The process-wide ChangeFeed, started on first use."""
+    global _feed
+    with _feed_lock:
+        if _feed is None:
+            _feed = ChangeFeed().start()
+        return _feed
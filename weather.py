@@ -0,0 +1,111 @@
+"""
+Shared open-meteo weather fetcher for the Home page.
+
+One WeatherService per (lat, lon) lives for the whole server process, so every
+browser session reads the same payload. get() never touches the network: it
+returns the last good payload straight away and, when that payload is older
+than the TTL, kicks off a single background refresh (stale-while-revalidate).
+Only one request is ever in flight per service and connections are pooled
+through a shared requests.Session.
+
+Environment:
+  DASHBOARD_WEATHER_URL   forecast endpoint (point at a local stub in tests)
+  DASHBOARD_WEATHER_TTL   seconds a payload counts as fresh (default 600)
+"""
+import os
+import threading
+import time
+from collections import namedtuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+DEFAULT_URL = "https://api.open-meteo.com/v1/forecast"
+DEFAULT_TTL = float(os.environ.get("DASHBOARD_WEATHER_TTL", "600"))
+RETRY_AFTER = 30.0  # seconds to wait after a failed fetch before trying again
+
+FORECAST_PARAMS = {
+    "current_weather": "true",
+    "daily": "temperature_2m_max,temperature_2m_min,sunrise,sunset,precipitation_sum",
+    "timezone": "Asia/Kolkata",
+}
+
+# payload: last good JSON (or None), age: seconds since it was fetched (or None),
+# stale: True once age passes the TTL, error: message from the last failed fetch
+WeatherSnapshot = namedtuple("WeatherSnapshot", ["payload", "age", "stale", "error"])
+
+
+def _make_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_http = _make_session()
+
+
+class WeatherService:
+    def __init__(self, lat, lon, url=None, ttl=DEFAULT_TTL, timeout=5):
+        self.url = url or os.environ.get("DASHBOARD_WEATHER_URL", DEFAULT_URL)
+        self.params = dict(FORECAST_PARAMS, latitude=lat, longitude=lon)
+        self.ttl = ttl
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._payload = None
+        self._fetched_at = None
+        self._last_attempt = 0.0
+        self._error = None
+        self._inflight = False
+
+    def get(self):
+        """Return the current snapshot without blocking; refresh in the background if due."""
+        now = time.monotonic()
+        with self._lock:
+            age = None if self._fetched_at is None else now - self._fetched_at
+            due = age is None or age > self.ttl
+            if due and not self._inflight and now - self._last_attempt >= self._retry_delay():
+                self._inflight = True
+                self._last_attempt = now
+                threading.Thread(target=self._refresh, name="weather-refresh", daemon=True).start()
+            return WeatherSnapshot(self._payload, age, age is not None and age > self.ttl, self._error)
+
+    def _retry_delay(self):
+        # Only back off after failures; a fresh service fetches immediately
+        return RETRY_AFTER if self._error else 0.0
+
+    def _refresh(self):
+        t0 = time.perf_counter()
+        try:
+            resp = _http.get(self.url, params=self.params, timeout=self.timeout)
+            resp.raise_for_status()
+            payload = resp.json()
+        except Exception as exc:
+            metrics.incr("weather_errors")
+            with self._lock:
+                self._error = str(exc) or exc.__class__.__name__
+                self._inflight = False
+            return
+        finally:
+            metrics.observe("weather_request", time.perf_counter() - t0)
+        with self._lock:
+            self._payload = payload
+            self._fetched_at = time.monotonic()
+            self._error = None
+            self._inflight = False
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_weather_service(lat, lon):
+    """Process-wide WeatherService for these coordinates."""
+    with _services_lock:
+        service = _services.get((lat, lon))
+        if service is None:
+            service = _services[(lat, lon)] = WeatherService(lat, lon)
+        return service